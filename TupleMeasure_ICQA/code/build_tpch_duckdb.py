@@ -2,14 +2,28 @@
 # -*- coding: utf-8 -*-
 
 import argparse
+import glob
 import os
+import re
 import duckdb
 
-def build_one(con: duckdb.DuckDBPyConnection, data_dir: str, table: str, create_sql: str):
-    path = os.path.join(data_dir, f"{table}.tbl")
-    if not os.path.exists(path):
-        raise FileNotFoundError(f"Missing file: {path}")
-    con.execute(create_sql, {"path": path})
+def table_paths(data_dir: str, table: str):
+    """
+    <table>.tbl, or its dbgen chunks <table>.tbl.1, <table>.tbl.2, ...
+    in chunk order, so the table keeps dbgen's row order.
+    """
+    paths = glob.glob(os.path.join(data_dir, f"{table}.tbl*"))
+    paths = [p for p in paths if re.fullmatch(rf"{re.escape(table)}\.tbl(\.\d+)?", os.path.basename(p))]
+    return sorted(paths, key=lambda p: int(p.rsplit(".", 1)[1]) if p[-1].isdigit() else 0)
+
+def build_one(con: duckdb.DuckDBPyConnection, data_dir: str, table: str, create_sql: str, load_sql: str):
+    paths = table_paths(data_dir, table)
+    if not paths:
+        raise FileNotFoundError(f"Missing file: {os.path.join(data_dir, f'{table}.tbl')}")
+    # PRIMARY KEY in create_sql: the ART index is built while loading
+    con.execute(create_sql)
+    # one read_csv over all chunks of the table
+    con.execute(load_sql, {"path": paths})
 
 def build_tpch_duckdb(data_dir: str, db_path: str):
     os.makedirs(os.path.dirname(db_path), exist_ok=True)
@@ -19,20 +33,27 @@ def build_tpch_duckdb(data_dir: str, db_path: str):
         os.remove(db_path)
 
     con = duckdb.connect(db_path)
-    con.execute("PRAGMA threads=4;")
+    con.execute(f"PRAGMA threads={os.cpu_count() or 4};")
 
     # -----------------------
     # region (3 + dummy)
     # -----------------------
     build_one(con, data_dir, "region", r"""
-        CREATE TABLE region AS
-        SELECT
-            CAST(c1 AS BIGINT)  AS r_regionkey,
-            c2                  AS r_name,
-            c3                  AS r_comment
+        CREATE TABLE region (
+            r_regionkey BIGINT,
+            r_name      VARCHAR,
+            r_comment   VARCHAR,
+            PRIMARY KEY (r_regionkey)
+        );
+    """, r"""
+        INSERT INTO region
+        SELECT * EXCLUDE (dummy)
         FROM read_csv($path,
-            delim='|', header=false,
-            columns={'c1':'VARCHAR','c2':'VARCHAR','c3':'VARCHAR','c4':'VARCHAR'}
+            delim='|', header=false, auto_detect=false,
+            parallel=true, buffer_size=33554432,
+            columns={
+              'r_regionkey':'BIGINT','r_name':'VARCHAR','r_comment':'VARCHAR','dummy':'VARCHAR'
+            }
         );
     """)
 
@@ -40,15 +61,23 @@ def build_tpch_duckdb(data_dir: str, db_path: str):
     # nation (4 + dummy)
     # -----------------------
     build_one(con, data_dir, "nation", r"""
-        CREATE TABLE nation AS
-        SELECT
-            CAST(c1 AS BIGINT)  AS n_nationkey,
-            c2                  AS n_name,
-            CAST(c3 AS BIGINT)  AS n_regionkey,
-            c4                  AS n_comment
+        CREATE TABLE nation (
+            n_nationkey BIGINT,
+            n_name      VARCHAR,
+            n_regionkey BIGINT,
+            n_comment   VARCHAR,
+            PRIMARY KEY (n_nationkey)
+        );
+    """, r"""
+        INSERT INTO nation
+        SELECT * EXCLUDE (dummy)
         FROM read_csv($path,
-            delim='|', header=false,
-            columns={'c1':'VARCHAR','c2':'VARCHAR','c3':'VARCHAR','c4':'VARCHAR','c5':'VARCHAR'}
+            delim='|', header=false, auto_detect=false,
+            parallel=true, buffer_size=33554432,
+            columns={
+              'n_nationkey':'BIGINT','n_name':'VARCHAR','n_regionkey':'BIGINT','n_comment':'VARCHAR',
+              'dummy':'VARCHAR'
+            }
         );
     """)
 
@@ -56,18 +85,26 @@ def build_tpch_duckdb(data_dir: str, db_path: str):
     # supplier (7 + dummy)
     # -----------------------
     build_one(con, data_dir, "supplier", r"""
-        CREATE TABLE supplier AS
-        SELECT
-            CAST(c1 AS BIGINT)  AS s_suppkey,
-            c2                  AS s_name,
-            c3                  AS s_address,
-            CAST(c4 AS BIGINT)  AS s_nationkey,
-            c5                  AS s_phone,
-            CAST(c6 AS DOUBLE)  AS s_acctbal,
-            c7                  AS s_comment
+        CREATE TABLE supplier (
+            s_suppkey   BIGINT,
+            s_name      VARCHAR,
+            s_address   VARCHAR,
+            s_nationkey BIGINT,
+            s_phone     VARCHAR,
+            s_acctbal   DOUBLE,
+            s_comment   VARCHAR,
+            PRIMARY KEY (s_suppkey)
+        );
+    """, r"""
+        INSERT INTO supplier
+        SELECT * EXCLUDE (dummy)
         FROM read_csv($path,
-            delim='|', header=false,
-            columns={'c1':'VARCHAR','c2':'VARCHAR','c3':'VARCHAR','c4':'VARCHAR','c5':'VARCHAR','c6':'VARCHAR','c7':'VARCHAR','c8':'VARCHAR'}
+            delim='|', header=false, auto_detect=false,
+            parallel=true, buffer_size=33554432,
+            columns={
+              's_suppkey':'BIGINT','s_name':'VARCHAR','s_address':'VARCHAR','s_nationkey':'BIGINT',
+              's_phone':'VARCHAR','s_acctbal':'DOUBLE','s_comment':'VARCHAR','dummy':'VARCHAR'
+            }
         );
     """)
 
@@ -75,19 +112,28 @@ def build_tpch_duckdb(data_dir: str, db_path: str):
     # customer (8 + dummy)
     # -----------------------
     build_one(con, data_dir, "customer", r"""
-        CREATE TABLE customer AS
-        SELECT
-            CAST(c1 AS BIGINT)  AS c_custkey,
-            c2                  AS c_name,
-            c3                  AS c_address,
-            CAST(c4 AS BIGINT)  AS c_nationkey,
-            c5                  AS c_phone,
-            CAST(c6 AS DOUBLE)  AS c_acctbal,
-            c7                  AS c_mktsegment,
-            c8                  AS c_comment
+        CREATE TABLE customer (
+            c_custkey    BIGINT,
+            c_name       VARCHAR,
+            c_address    VARCHAR,
+            c_nationkey  BIGINT,
+            c_phone      VARCHAR,
+            c_acctbal    DOUBLE,
+            c_mktsegment VARCHAR,
+            c_comment    VARCHAR,
+            PRIMARY KEY (c_custkey)
+        );
+    """, r"""
+        INSERT INTO customer
+        SELECT * EXCLUDE (dummy)
         FROM read_csv($path,
-            delim='|', header=false,
-            columns={'c1':'VARCHAR','c2':'VARCHAR','c3':'VARCHAR','c4':'VARCHAR','c5':'VARCHAR','c6':'VARCHAR','c7':'VARCHAR','c8':'VARCHAR','c9':'VARCHAR'}
+            delim='|', header=false, auto_detect=false,
+            parallel=true, buffer_size=33554432,
+            columns={
+              'c_custkey':'BIGINT','c_name':'VARCHAR','c_address':'VARCHAR','c_nationkey':'BIGINT',
+              'c_phone':'VARCHAR','c_acctbal':'DOUBLE','c_mktsegment':'VARCHAR','c_comment':'VARCHAR',
+              'dummy':'VARCHAR'
+            }
         );
     """)
 
@@ -95,20 +141,29 @@ def build_tpch_duckdb(data_dir: str, db_path: str):
     # part (9 + dummy)
     # -----------------------
     build_one(con, data_dir, "part", r"""
-        CREATE TABLE part AS
-        SELECT
-            CAST(c1 AS BIGINT)  AS p_partkey,
-            c2                  AS p_name,
-            c3                  AS p_mfgr,
-            c4                  AS p_brand,
-            c5                  AS p_type,
-            CAST(c6 AS BIGINT)  AS p_size,
-            c7                  AS p_container,
-            CAST(c8 AS DOUBLE)  AS p_retailprice,
-            c9                  AS p_comment
+        CREATE TABLE part (
+            p_partkey     BIGINT,
+            p_name        VARCHAR,
+            p_mfgr        VARCHAR,
+            p_brand       VARCHAR,
+            p_type        VARCHAR,
+            p_size        BIGINT,
+            p_container   VARCHAR,
+            p_retailprice DOUBLE,
+            p_comment     VARCHAR,
+            PRIMARY KEY (p_partkey)
+        );
+    """, r"""
+        INSERT INTO part
+        SELECT * EXCLUDE (dummy)
         FROM read_csv($path,
-            delim='|', header=false,
-            columns={'c1':'VARCHAR','c2':'VARCHAR','c3':'VARCHAR','c4':'VARCHAR','c5':'VARCHAR','c6':'VARCHAR','c7':'VARCHAR','c8':'VARCHAR','c9':'VARCHAR','c10':'VARCHAR'}
+            delim='|', header=false, auto_detect=false,
+            parallel=true, buffer_size=33554432,
+            columns={
+              'p_partkey':'BIGINT','p_name':'VARCHAR','p_mfgr':'VARCHAR','p_brand':'VARCHAR',
+              'p_type':'VARCHAR','p_size':'BIGINT','p_container':'VARCHAR','p_retailprice':'DOUBLE',
+              'p_comment':'VARCHAR','dummy':'VARCHAR'
+            }
         );
     """)
 
@@ -116,16 +171,24 @@ def build_tpch_duckdb(data_dir: str, db_path: str):
     # partsupp (5 + dummy)
     # -----------------------
     build_one(con, data_dir, "partsupp", r"""
-        CREATE TABLE partsupp AS
-        SELECT
-            CAST(c1 AS BIGINT)  AS ps_partkey,
-            CAST(c2 AS BIGINT)  AS ps_suppkey,
-            CAST(c3 AS BIGINT)  AS ps_availqty,
-            CAST(c4 AS DOUBLE)  AS ps_supplycost,
-            c5                  AS ps_comment
+        CREATE TABLE partsupp (
+            ps_partkey    BIGINT,
+            ps_suppkey    BIGINT,
+            ps_availqty   BIGINT,
+            ps_supplycost DOUBLE,
+            ps_comment    VARCHAR,
+            PRIMARY KEY (ps_partkey, ps_suppkey)
+        );
+    """, r"""
+        INSERT INTO partsupp
+        SELECT * EXCLUDE (dummy)
         FROM read_csv($path,
-            delim='|', header=false,
-            columns={'c1':'VARCHAR','c2':'VARCHAR','c3':'VARCHAR','c4':'VARCHAR','c5':'VARCHAR','c6':'VARCHAR'}
+            delim='|', header=false, auto_detect=false,
+            parallel=true, buffer_size=33554432,
+            columns={
+              'ps_partkey':'BIGINT','ps_suppkey':'BIGINT','ps_availqty':'BIGINT','ps_supplycost':'DOUBLE',
+              'ps_comment':'VARCHAR','dummy':'VARCHAR'
+            }
         );
     """)
 
@@ -133,20 +196,29 @@ def build_tpch_duckdb(data_dir: str, db_path: str):
     # orders (9 + dummy)
     # -----------------------
     build_one(con, data_dir, "orders", r"""
-        CREATE TABLE orders AS
-        SELECT
-            CAST(c1 AS BIGINT)  AS o_orderkey,
-            CAST(c2 AS BIGINT)  AS o_custkey,
-            c3                  AS o_orderstatus,
-            CAST(c4 AS DOUBLE)  AS o_totalprice,
-            CAST(c5 AS DATE)    AS o_orderdate,
-            c6                  AS o_orderpriority,
-            c7                  AS o_clerk,
-            CAST(c8 AS BIGINT)  AS o_shippriority,
-            c9                  AS o_comment
+        CREATE TABLE orders (
+            o_orderkey      BIGINT,
+            o_custkey       BIGINT,
+            o_orderstatus   VARCHAR,
+            o_totalprice    DOUBLE,
+            o_orderdate     DATE,
+            o_orderpriority VARCHAR,
+            o_clerk         VARCHAR,
+            o_shippriority  BIGINT,
+            o_comment       VARCHAR,
+            PRIMARY KEY (o_orderkey)
+        );
+    """, r"""
+        INSERT INTO orders
+        SELECT * EXCLUDE (dummy)
         FROM read_csv($path,
-            delim='|', header=false,
-            columns={'c1':'VARCHAR','c2':'VARCHAR','c3':'VARCHAR','c4':'VARCHAR','c5':'VARCHAR','c6':'VARCHAR','c7':'VARCHAR','c8':'VARCHAR','c9':'VARCHAR','c10':'VARCHAR'}
+            delim='|', header=false, auto_detect=false,
+            parallel=true, buffer_size=33554432,
+            columns={
+              'o_orderkey':'BIGINT','o_custkey':'BIGINT','o_orderstatus':'VARCHAR','o_totalprice':'DOUBLE',
+              'o_orderdate':'DATE','o_orderpriority':'VARCHAR','o_clerk':'VARCHAR','o_shippriority':'BIGINT',
+              'o_comment':'VARCHAR','dummy':'VARCHAR'
+            }
         );
     """)
 
@@ -154,43 +226,41 @@ def build_tpch_duckdb(data_dir: str, db_path: str):
     # lineitem (16 + dummy)
     # -----------------------
     build_one(con, data_dir, "lineitem", r"""
-        CREATE TABLE lineitem AS
-        SELECT
-            CAST(c1 AS BIGINT)   AS l_orderkey,
-            CAST(c2 AS BIGINT)   AS l_partkey,
-            CAST(c3 AS BIGINT)   AS l_suppkey,
-            CAST(c4 AS BIGINT)   AS l_linenumber,
-            CAST(c5 AS DOUBLE)   AS l_quantity,
-            CAST(c6 AS DOUBLE)   AS l_extendedprice,
-            CAST(c7 AS DOUBLE)   AS l_discount,
-            CAST(c8 AS DOUBLE)   AS l_tax,
-            c9                   AS l_returnflag,
-            c10                  AS l_linestatus,
-            CAST(c11 AS DATE)    AS l_shipdate,
-            CAST(c12 AS DATE)    AS l_commitdate,
-            CAST(c13 AS DATE)    AS l_receiptdate,
-            c14                  AS l_shipinstruct,
-            c15                  AS l_shipmode,
-            c16                  AS l_comment
+        CREATE TABLE lineitem (
+            l_orderkey      BIGINT,
+            l_partkey       BIGINT,
+            l_suppkey       BIGINT,
+            l_linenumber    BIGINT,
+            l_quantity      DOUBLE,
+            l_extendedprice DOUBLE,
+            l_discount      DOUBLE,
+            l_tax           DOUBLE,
+            l_returnflag    VARCHAR,
+            l_linestatus    VARCHAR,
+            l_shipdate      DATE,
+            l_commitdate    DATE,
+            l_receiptdate   DATE,
+            l_shipinstruct  VARCHAR,
+            l_shipmode      VARCHAR,
+            l_comment       VARCHAR,
+            PRIMARY KEY (l_orderkey, l_linenumber)
+        );
+    """, r"""
+        INSERT INTO lineitem
+        SELECT * EXCLUDE (dummy)
         FROM read_csv($path,
-            delim='|', header=false,
+            delim='|', header=false, auto_detect=false,
+            parallel=true, buffer_size=33554432,
             columns={
-              'c1':'VARCHAR','c2':'VARCHAR','c3':'VARCHAR','c4':'VARCHAR',
-              'c5':'VARCHAR','c6':'VARCHAR','c7':'VARCHAR','c8':'VARCHAR',
-              'c9':'VARCHAR','c10':'VARCHAR','c11':'VARCHAR','c12':'VARCHAR',
-              'c13':'VARCHAR','c14':'VARCHAR','c15':'VARCHAR','c16':'VARCHAR','c17':'VARCHAR'
+              'l_orderkey':'BIGINT','l_partkey':'BIGINT','l_suppkey':'BIGINT','l_linenumber':'BIGINT',
+              'l_quantity':'DOUBLE','l_extendedprice':'DOUBLE','l_discount':'DOUBLE','l_tax':'DOUBLE',
+              'l_returnflag':'VARCHAR','l_linestatus':'VARCHAR','l_shipdate':'DATE','l_commitdate':'DATE',
+              'l_receiptdate':'DATE','l_shipinstruct':'VARCHAR','l_shipmode':'VARCHAR','l_comment':'VARCHAR',
+              'dummy':'VARCHAR'
             }
         );
     """)
 
-    # Helpful indexes (optional, but speeds up joins)
-    con.execute("CREATE INDEX idx_orders_orderkey ON orders(o_orderkey);")
-    con.execute("CREATE INDEX idx_lineitem_orderkey ON lineitem(l_orderkey);")
-    con.execute("CREATE INDEX idx_customer_custkey ON customer(c_custkey);")
-    con.execute("CREATE INDEX idx_nation_nationkey ON nation(n_nationkey);")
-    con.execute("CREATE INDEX idx_region_regionkey ON region(r_regionkey);")
-    con.execute("CREATE INDEX idx_partsupp_pair ON partsupp(ps_partkey, ps_suppkey);")
-
     con.close()
     print(f"[OK] Built DuckDB database: {db_path}")
 
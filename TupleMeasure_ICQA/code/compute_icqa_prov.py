@@ -15,7 +15,7 @@ Inputs:
       /Users/Desktop/tpchdata/outputs/scores/tuple_measures.parquet
 
   - Support sets (include pk):
-      /Users/Desktop/tpchdata/support_sets/sf<scale>/<subset>/<ratio>/seed<seed>/Qk_support.parquet
+      /Users/Desktop/tpchdata/support_sets/scale=sf<scale>/subset=<subset>/ratio=<ratio>/seed=seed<seed>/Qk_support.parquet
 
 Output:
   - Answer-level ICQA parquet:
@@ -30,7 +30,7 @@ Schema:
 from pathlib import Path
 import time
 
-import pandas as pd
+import duckdb
 
 # ----------------------------------------------------------------------
 # 0. Choose which aggregator to compute
@@ -56,22 +56,122 @@ QUERIES  = ["Q1", "Q2", "Q3", "Q4", "Q5"]
 # 4 tuple measures
 MEASURES = ["CBM", "CIM", "PIM", "RIM"]
 
+# Per-DB support files (hive layout, as written by support_sets):
+# scale=sf<scale>/subset=<subset>/ratio=<ratio>/seed=seed<seed>/Qk_support.parquet
+SUPPORT_GLOB = "scale=sf*/subset=*/ratio=*/seed=seed*/Q*_support.parquet"
+SUPPORT_PATH_RE = r"scale=sf([^/]+)/subset=([^/]+)/ratio=([^/]+)/seed=seed([^/]+)/(Q[0-9]+)_support\.parquet$"
+
 
 # ----------------------------------------------------------------------
-# 1. Function: Standardize scale/seed, applicable to situations without prefix "sf"/"seed"
+# 1. SQL: answer-level ICQA for all DBs and queries in one pass
 # ----------------------------------------------------------------------
 
-def norm_scale(x: str) -> str:
-    s = str(x)
-    if s.startswith("sf"):
-        return s[2:]
-    return s
+def build_icqa_sql(support_files, out_file: Path) -> str:
+    """
+    One DuckDB query over all support files and tuple_measures:
+
+      - DB key (scale/subset/ratio/seed) and qname are taken from the support
+        file path, as the per-DB loop did; scale/seed are compared without
+        their "sf"/"seed" prefixes.
+      - Every support row is joined to the tuple measures of its DB on
+        (relation, pk); ICQA_prov^m(answer) = sum of im_m over those rows.
+      - If no support tuple of a query has a measure, all of its answers are
+        kept with NULL ICQA values (tuple-consistent query); otherwise only
+        answers with at least one measured tuple are kept.
+      - Sums are taken in DOUBLE; answer_id / ICQA values are written as
+        INTEGER / FLOAT.
+      - Written as zstd Parquet (repeated key strings are dictionary-encoded
+        by the DuckDB writer).
+    """
+    files_sql = ", ".join(f"'{f.as_posix()}'" for f in support_files)
+    queries_sql = ", ".join(f"'{q}'" for q in QUERIES)
+    sum_cols = ",\n            ".join(
+        f"COALESCE(SUM(value) FILTER (WHERE measure = '{m}'), 0.0) AS sum_{m.lower()}"
+        for m in MEASURES
+    )
+    out_cols = ",\n        ".join(
+        f"CAST(CASE WHEN q_measured THEN sum_{m.lower()} END AS FLOAT) AS icqa_{AGGREGATOR}_{m.lower()}"
+        for m in MEASURES
+    )
 
-def norm_seed(x: str) -> str:
-    s = str(x)
-    if s.startswith("seed"):
-        return s[4:]
-    return s
+    return f"""
+    COPY (
+    WITH tm AS (
+        SELECT
+            CAST(scale  AS VARCHAR) AS scale,
+            CAST(subset AS VARCHAR) AS subset,
+            CAST(ratio  AS VARCHAR) AS ratio,
+            CAST(seed   AS VARCHAR) AS seed,
+            CAST(relation AS VARCHAR) AS relation,
+            CAST(pk       AS VARCHAR) AS pk,
+            UPPER(CAST(measure AS VARCHAR)) AS measure,
+            CAST(value AS DOUBLE) AS value
+        FROM read_parquet('{TUPLE_MEASURES_FILE.as_posix()}')
+    ),
+    dbs AS (
+        SELECT DISTINCT
+            scale, subset, ratio, seed,
+            regexp_replace(scale, '^sf', '')  AS scale_norm,
+            regexp_replace(seed, '^seed', '') AS seed_norm
+        FROM tm
+    ),
+    supp AS (
+        SELECT
+            regexp_extract(filename, '{SUPPORT_PATH_RE}',
+                           ['scale_norm', 'subset', 'ratio', 'seed_norm', 'qname']) AS k,
+            answer_id,
+            answervalue,
+            CAST(rel AS VARCHAR) AS relation,
+            CAST(pk  AS VARCHAR) AS pk
+        FROM read_parquet([{files_sql}], filename = true, union_by_name = true)
+    ),
+    joined AS (
+        SELECT
+            d.scale, d.subset, d.ratio, d.seed,
+            s.k.qname AS qname,
+            s.answer_id,
+            s.answervalue,
+            tm.measure,
+            tm.value
+        FROM supp s
+        JOIN dbs d
+          ON d.scale_norm = s.k.scale_norm
+         AND d.subset     = s.k.subset
+         AND d.ratio      = s.k.ratio
+         AND d.seed_norm  = s.k.seed_norm
+        LEFT JOIN tm
+          ON tm.scale    = d.scale
+         AND tm.subset   = d.subset
+         AND tm.ratio    = d.ratio
+         AND tm.seed     = d.seed
+         AND tm.relation = s.relation
+         AND tm.pk       = s.pk
+        WHERE s.k.qname IN ({queries_sql})
+    ),
+    per_answer AS (
+        SELECT
+            scale, subset, ratio, seed, qname, answer_id, answervalue,
+            COUNT(measure) > 0 AS a_measured,
+            {sum_cols}
+        FROM joined
+        GROUP BY ALL
+    ),
+    per_query AS (
+        SELECT
+            *,
+            BOOL_OR(a_measured) OVER (PARTITION BY scale, subset, ratio, seed, qname) AS q_measured
+        FROM per_answer
+    )
+    SELECT
+        scale, subset, ratio, seed, qname,
+        CAST(answer_id AS INTEGER) AS answer_id,
+        CAST(answervalue AS VARCHAR) AS answervalue,
+        {out_cols}
+    FROM per_query
+    WHERE a_measured OR NOT q_measured
+    ORDER BY scale, subset, ratio, seed, qname, answer_id
+    ) TO '{out_file.as_posix()}' (FORMAT PARQUET, COMPRESSION zstd, COMPRESSION_LEVEL 3)
+    """
 
 
 # ----------------------------------------------------------------------
@@ -84,206 +184,18 @@ def main():
     print(f"[INFO] AGGREGATOR = {AGGREGATOR}")
     print(f"[INFO] Loading tuple-level measures from: {TUPLE_MEASURES_FILE}")
 
-    tm = pd.read_parquet(TUPLE_MEASURES_FILE)
-
-    # Standardize types to avoid type mismatches during mergers
-    for col in ["scale", "subset", "ratio", "seed", "relation", "pk", "measure"]:
-        if col in tm.columns:
-            tm[col] = tm[col].astype(str)
-        else:
-            raise ValueError(f"Column '{col}' not found in tuple_measures parquet")
-
-    tm["measure"] = tm["measure"].str.upper()
+    support_files = sorted(SUPPORT_ROOT.glob(SUPPORT_GLOB))
+    print(f"[INFO] Found {len(support_files)} support files under: {SUPPORT_ROOT}")
 
-    # ICQA for all answers
-    all_rows = []
-
-    # DB by (scale, subset, ratio, seed)
-    db_groups = tm[["scale", "subset", "ratio", "seed"]].drop_duplicates().sort_values(
-        ["scale", "subset", "ratio", "seed"]
-    )
-
-    print(f"[INFO] Found {len(db_groups)} DB configurations in tuple_measures.")
-
-    for _, db_row in db_groups.iterrows():
-        scale_raw  = db_row["scale"]
-        subset     = db_row["subset"]
-        ratio      = db_row["ratio"]
-        seed_raw   = db_row["seed"]
-
-        # Normalize scale/seed (remove possible prefixes such as "sf"/"seed")
-        scale_norm = norm_scale(scale_raw)
-        seed_norm  = norm_seed(seed_raw)
-
-        print(f"== DB: scale={scale_raw} (sf{scale_norm}), subset={subset}, ratio={ratio}, seed={seed_raw} (seed{seed_norm})")
-
-        # current DB tuple_measure
-        tm_db = tm[
-            (tm["scale"]  == scale_raw)
-            & (tm["subset"] == subset)
-            & (tm["ratio"]  == ratio)
-            & (tm["seed"]   == seed_raw)
-        ].copy()
-
-        if tm_db.empty:
-            print("   [WARN] no tuple_measures rows for this DB, skip.")
-            continue
-
-        
-        tm_db = tm_db[["relation", "pk", "measure", "value"]].copy()
-
-        # support_sets for current DB
-        support_dir = SUPPORT_ROOT / f"sf{scale_norm}" / subset / ratio / f"seed{seed_norm}"
-        if not support_dir.exists():
-            print(f"   [WARN] support dir not found: {support_dir}, skip this DB.")
-            continue
-
-        # Traverse five queries
-        for qname in QUERIES:
-            supp_file = support_dir / f"{qname}_support.parquet"
-            if not supp_file.exists():
-                print(f"   [WARN] support file not found: {supp_file}, skip {qname}.")
-                continue
-
-            print(f"   [Q={qname}] loading support sets from {supp_file.name}")
-            support_df = pd.read_parquet(supp_file)
-            if support_df.empty:
-                print("      [INFO] support_df empty, skip.")
-                continue
-
-            # check pk exsits or not
-            if "pk" not in support_df.columns:
-                raise ValueError(f"'pk' column not found in support file: {supp_file}")
-
-            
-            support_df = support_df.copy()
-            support_df["relation"] = support_df["rel"].astype(str)
-            support_df["pk"]       = support_df["pk"].astype(str)
-
-            # Support size for each answer (number of deduplicated tuples)
-            support_df["tuple_key"] = support_df["relation"] + "#" + support_df["pk"]
-            support_size = (
-                support_df.groupby("answer_id")["tuple_key"]
-                .nunique()
-                .rename("support_size")
-                .reset_index()
-            )
-
-            # merge
-            merged = support_df.merge(
-                tm_db,
-                on=["relation", "pk"],
-                how="left",        # without inconsistency
-                validate="m:m",
-            )
-
-            # measure for tuple measures exist
-            measured = merged[merged["measure"].notna()].copy()
-
-            if measured.empty:
-                # For all answers: sum (im_m)=0 → ICQA by aggregator (currently all 0)
-                answers = (
-                    support_df[["answer_id", "answervalue"]]
-                    .drop_duplicates()
-                    .reset_index(drop=True)
-                )
-                answers = answers.merge(support_size, on="answer_id", how="left")
-
-                for _, row in answers.iterrows():
-                    ans_id  = int(row["answer_id"])
-                    ans_val = row["answervalue"]
-                    sup_sz  = int(row["support_size"])
-
-                    out_row = {
-                        "scale":  str(scale_raw),
-                        "subset": str(subset),
-                        "ratio":  str(ratio),
-                        "seed":   str(seed_raw),
-                        "qname":  qname,
-                        "answer_id":   ans_id,
-                        "answervalue": ans_val,
-                    }
-
-                    for m in MEASURES:
-                        # no measure，sum(im_m)=0
-                        icqa_val = 0.0
-
-                    all_rows.append(out_row)
-
-                print("      [INFO] no tuple_measures matched; all ICQA = 0 for this query.")
-                continue
-
-            # sum for each t im_m(t)  per (answer_id, answervalue, measure)
-            agg = (
-                measured
-                .groupby(["answer_id", "answervalue", "measure"], as_index=False)["value"]
-                .sum()
-            )
-
-            # pivot ：answer for row，attribute CBM/CIM/PIM/RIM  sum(im_m)
-            sum_wide = agg.pivot_table(
-                index=["answer_id", "answervalue"],
-                columns="measure",
-                values="value",
-                aggfunc="sum",
-            )
-
-            for m in MEASURES:
-                if m not in sum_wide.columns:
-                    sum_wide[m] = 0.0
-
-            sum_wide = sum_wide.reset_index()
-
-            # merge support_size
-            sum_wide = sum_wide.merge(support_size, on="answer_id", how="left")
-
-            # compute ICQA for each answer
-            for _, row in sum_wide.iterrows():
-                ans_id  = int(row["answer_id"])
-                ans_val = row["answervalue"]
-                sup_sz  = int(row["support_size"])
-
-                out_row = {
-                    "scale":  str(scale_raw),
-                    "subset": str(subset),
-                    "ratio":  str(ratio),
-                    "seed":   str(seed_raw),
-                    "qname":  qname,
-                    "answer_id":   ans_id,
-                    "answervalue": ans_val,
-                }
-
-                for m in MEASURES:
-                    sum_im = float(row[m])  # ∑_t im_m(t)
-                    icqa_val = sum_im
-
-                    
-
-                    out_row[f"icqa_{AGGREGATOR}_{m.lower()}"] = icqa_val
-
-                all_rows.append(out_row)
-
-    
-    if not all_rows:
+    if not support_files:
         print("[INFO] No answers found; nothing to write.")
         return
 
-    out_df = pd.DataFrame(all_rows)
-
-    # use answervalue as index
-    out_df["answervalue"] = out_df["answervalue"].astype(str)
-
-    # scale/subset/ratio/seed string
-    for col in ["scale", "subset", "ratio", "seed", "qname"]:
-        out_df[col] = out_df[col].astype(str)
-
-    # Adjust column order
-    front_cols = ["scale", "subset", "ratio", "seed", "qname", "answer_id", "answervalue"]
-    other_cols = [c for c in out_df.columns if c not in front_cols]
-    out_df = out_df[front_cols + other_cols]
+    con = duckdb.connect()
+    n_rows = con.execute(build_icqa_sql(support_files, OUT_FILE)).fetchone()[0]
+    con.close()
 
-    print(f"[INFO] Writing {len(out_df)} rows to: {OUT_FILE}")
-    out_df.to_parquet(OUT_FILE, index=False)
+    print(f"[INFO] Wrote {n_rows} rows to: {OUT_FILE}")
 
 
 if __name__ == "__main__":
@@ -19,7 +19,8 @@ For each answer (scale,subset,ratio,seed,qname,answer_id):
 
 input：
   - support set :
-      /Users/Desktop/tpchdata/support_sets/all_support_sets.parquet
+      /Users/Desktop/tpchdata/support_sets/all_support_sets.sql
+      (view over the per-DB support files, written by support_sets)
   - tuple-level inconsistency measures:
       /Users/Desktop/tpchdata/outputs/scores/tuple_measures.parquet
 
@@ -27,19 +28,26 @@ output：
   - /Users/Desktop/tpchdata/outputs/icqa/icqa_resp.parquet
 """
 
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+import os
 from pathlib import Path
 import time
-from typing import List, Set, Dict, Any
+from typing import List, Dict, Any, FrozenSet, Tuple
 
 import duckdb
+import numba as nb
+import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 
-from pysat.solvers import Glucose4
-from pysat.card import CardEnc
+from pysat.examples.rc2 import RC2
+from pysat.formula import WCNF
 
 BASE = Path("/Users/Desktop/tpchdata")
 
-SUPPORT_ALL_FILE = BASE / "support_sets" / "all_support_sets.parquet"
+SUPPORT_VIEW_FILE = BASE / "support_sets" / "all_support_sets.sql"
 TUPLE_MEASURES_FILE = BASE / "outputs" / "scores" / "tuple_measures.parquet"
 
 OUT_DIR  = BASE / "outputs" / "icqa"
@@ -49,66 +57,254 @@ OUT_FILE = OUT_DIR / "icqa_resp.parquet"
 QUERIES  = ["Q1", "Q2", "Q3", "Q4", "Q5"]
 MEASURES = ["CBM", "CIM", "PIM", "RIM"]
 
+# repeated key columns, dictionary-encoded in the output
+DICT_COLS = ["scale", "subset", "ratio", "seed", "qname"]
+
+_ZERO_MEASURES = np.zeros(len(MEASURES))
+
+# worker processes for the per-answer solves
+N_WORKERS = os.cpu_count() or 1
+
+# answers with at most this many tuples use the numba uint64 bitmask solver
+BITSET_MAX_TUPLES = 64
+# branch-and-bound nodes per family before falling back to MaxSAT
+BITSET_NODE_BUDGET = 20000
+
+
+def support_masks(incidence: np.ndarray) -> np.ndarray:
+    """
+    Gamma_i as uint64 bitmasks (bit t set iff t in Gamma_i); needs n <= 64.
+    """
+    bits = np.uint64(1) << np.arange(incidence.shape[1], dtype=np.uint64)
+    return np.bitwise_or.reduce(np.where(incidence, bits, np.uint64(0)), axis=1)
+
 
 def min_hitting_set_size_for_t(
-    support_sets: List[Set[int]],
-    universe_size: int,
+    incidence: np.ndarray,
     t_idx: int,
 ) -> int:
     """
-    For support_sets on Universe = {0..n-1} 
+    incidence: bool matrix (supports x tuples) of one answer on Universe = {0..n-1},
+    row i is Gamma_i.
     For fixed tuple index t_idx, compute the size of S^-t minimal hitting set:
 
-        S^-t = { S in support_sets | t_idx not in S }
+        S^-t = { Gamma_i | not incidence[i, t_idx] }
 
     if S^-t empty, return 0。
-    PySAT + Glucose4
+    Identical sub-families (common across tuples of one answer) are solved once.
     """
-    sets_minus_t = [S for S in support_sets if t_idx not in S]
-    if not sets_minus_t:
+    sub = incidence[~incidence[:, t_idx]]
+    if sub.shape[0] == 0:
         return 0
+    family = frozenset(frozenset(np.flatnonzero(row).tolist()) for row in sub)
+    return _min_hitting_set_size(family)
+
+
+# ----------------------------------------------------------------------
+# Bitset hitting sets (n <= 64), compiled with numba
+# ----------------------------------------------------------------------
+
+@nb.njit(cache=True)
+def _popcount(x):
+    n = 0
+    while x:
+        x &= x - np.uint64(1)
+        n += 1
+    return n
+
+
+@nb.njit(cache=True)
+def _bitset_search(sets, budget):
+    """
+    Branch-and-bound over a family of bitmask sets (sorted by popcount):
+    branch on each bit of the set with the fewest bits, pruned by a greedy
+    packing of pairwise disjoint sets (each needs its own element of H).
+    Depth-first with an explicit stack: level d holds the family left after
+    d branching choices. Returns -1 once more than budget nodes are visited.
+    """
+    k = sets.shape[0]
+    fam = np.empty((k + 1, k), dtype=np.uint64)
+    size = np.zeros(k + 1, dtype=np.int64)
+    rest = np.zeros(k + 1, dtype=np.uint64)
+    fam[0, :] = sets
+    size[0] = k
+
+    best = k
+    nodes = 0
+    level = 0
+    enter = True
+    while level >= 0:
+        if enter:
+            enter = False
+            nodes += 1
+            if nodes > budget:
+                return -1
+            n = size[level]
+            if n == 0:
+                best = min(best, level)
+                level -= 1
+                continue
+
+            used = np.uint64(0)
+            lower = 0
+            pick = fam[level, 0]
+            pick_bits = 65
+            for i in range(n):
+                S = fam[level, i]
+                if S & used == 0:
+                    used |= S
+                    lower += 1
+                c = _popcount(S)
+                if c < pick_bits:
+                    pick = S
+                    pick_bits = c
+            if level + lower >= best:
+                level -= 1
+                continue
+            rest[level] = pick
+
+        # next branch of this level: put the lowest remaining bit of pick in H
+        r = rest[level]
+        if r == 0:
+            level -= 1
+            continue
+        b = r & (~r + np.uint64(1))
+        rest[level] = r ^ b
+        kk = 0
+        for i in range(size[level]):
+            S = fam[level, i]
+            if S & b == 0:
+                fam[level + 1, kk] = S
+                kk += 1
+        size[level + 1] = kk
+        level += 1
+        enter = True
+    return best
+
+
+@nb.njit(cache=True)
+def _bitset_mhs(sets, budget):
+    """
+    Minimum hitting set size of a family of bitmask sets, with the same
+    singleton reduction as _min_hitting_set_size; -1 if the search
+    exceeds budget nodes.
+    """
+    for S in sets:
+        if S == 0:
+            # Empty set must be hit, return 0 directly
+            return 0
+
+    n_forced = 0
+    while True:
+        forced = np.uint64(0)
+        for S in sets:
+            if _popcount(S) == 1:
+                forced |= S
+        if forced == 0:
+            break
+        n_forced += _popcount(forced)
+        sets = sets[(sets & forced) == 0]
+
+    sets = np.unique(sets)
+    if sets.shape[0] <= 1:
+        return n_forced + sets.shape[0]
+
+    bits = np.empty(sets.shape[0], dtype=np.int64)
+    for i in range(sets.shape[0]):
+        bits[i] = _popcount(sets[i])
+    sets = sets[np.argsort(bits, kind="mergesort")]
+
+    h = _bitset_search(sets, budget)
+    if h < 0:
+        return -1
+    return n_forced + h
+
+
+@nb.njit(cache=True)
+def bitset_h_star(masks, targets, budget):
+    """
+    h*_t for each tuple index in targets, with masks = support_masks(M):
+        S^-t = masks without bit t
+    -1 where the search exceeded budget nodes (caller falls back to MaxSAT).
+    """
+    out = np.empty(targets.shape[0], dtype=np.int64)
+    for j in range(targets.shape[0]):
+        bit = np.uint64(1) << np.uint64(targets[j])
+        sub = masks[(masks & bit) == 0]
+        out[j] = 0 if sub.shape[0] == 0 else _bitset_mhs(sub, budget)
+    return out
+
+
+@lru_cache(maxsize=1 << 16)
+def _min_hitting_set_size(family: FrozenSet[FrozenSet[int]]) -> int:
+    """
+    Minimum hitting set size of `family`.
+
+    Cheap reductions first: every singleton {i} forces i into H, so the sets
+    it hits are dropped (repeated until no singleton is left); 0 or 1 set
+    left needs no solver. Otherwise one MaxSAT solve (PySAT RC2 + Glucose4):
+      hard: OR_{i in S} x_i   for each S in family
+      soft: -x_i, weight 1    for each i in the union
+    The optimal cost is the number of selected x_i, i.e. min |H|.
+    """
+    if any(not S for S in family):
+        # EEmpty set must be hit, return 0 directly
+        return 0
+
+    n_forced = 0
+    while True:
+        forced = {i for S in family if len(S) == 1 for i in S}
+        if not forced:
+            break
+        n_forced += len(forced)
+        family = frozenset(S for S in family if not (S & forced))
 
-    n = universe_size
+    if len(family) <= 1:
+        return n_forced + len(family)
 
     def var(i: int) -> int:
         # PySAT from 1
         return i + 1
 
-    for k in range(0, n + 1):
-        with Glucose4(bootstrap_with=[]) as solver:
-            # each S in S^-t: OR_{i in S} x_i
-            for S in sets_minus_t:
-                if not S:
-                    # EEmpty set must be hit, return 0 directly
-                    return 0
-                solver.add_clause([var(i) for i in S])
-
-            # sum x_i <= k
-            card = CardEnc.atmost(
-                lits=[var(i) for i in range(n)],
-                bound=k,
-            )
-            for cl in card.clauses:
-                solver.add_clause(cl)
+    wcnf = WCNF()
+    for S in family:
+        wcnf.append([var(i) for i in S])
+    for i in set().union(*family):
+        wcnf.append([-var(i)], weight=1)
 
-            if solver.solve():
-                return k
+    with RC2(wcnf, solver="g4") as rc2:
+        rc2.compute()
+        return n_forced + rc2.cost
 
-    return n
+
+def build_tm_by_key(tm_db: pd.DataFrame) -> Dict[Tuple[str, str], np.ndarray]:
+    """
+    tuple_measures of one DB as (relation, pk) -> [CBM, CIM, PIM, RIM] values
+    (zero-filled), built once per DB and shared by all answers of all queries.
+    """
+    tm_wide = (
+        tm_db.pivot_table(index=["relation", "pk"], columns="measure", values="value", aggfunc="sum")
+        .reindex(columns=MEASURES)
+        .fillna(0.0)
+    )
+    return dict(zip(tm_wide.index, tm_wide.to_numpy(dtype=float)))
 
 
-def compute_resp_for_query(
+def build_resp_payloads(
     scale: str,
     subset: str,
     ratio: str,
     seed: str,
     qname: str,
     support_q: pd.DataFrame,
-    tm_db: pd.DataFrame,
-) -> List[Dict[str, Any]]:
+    tm_by_key: Dict[Tuple[str, str], np.ndarray],
+) -> List[Tuple[Dict[str, Any], np.ndarray, np.ndarray]]:
     """
     for all answers of one (scale,subset,ratio,seed,qname) pair，
-    compute exact responsibility-based ICQA。
+    build the (out_row, M, V) payloads solved by _solve_answer:
+      M: bool incidence matrix (supports x tuples), M[i, t] iff t in Gamma_i
+      V: tuple measures (tuples x MEASURES), aligned with the columns of M
+    tm_by_key: see build_tm_by_key.
     """
     if "support_id" not in support_q.columns:
         raise ValueError("support_q miss 'support_id' ")
@@ -117,82 +313,32 @@ def compute_resp_for_query(
     df["relation"] = df["rel"].astype(str)
     df["pk"]       = df["pk"].astype(str)
 
-    out_rows: List[Dict[str, Any]] = []
+    # integer tuple ids for the query, and the measures of each id
+    df["tuple_id"], tuple_keys = pd.factorize(pd.MultiIndex.from_arrays([df["relation"], df["pk"]]))
+    V_q = np.array([tm_by_key.get(tid, _ZERO_MEASURES) for tid in tuple_keys]).reshape(-1, len(MEASURES))
+
+    payloads: List[Tuple[Dict[str, Any], np.ndarray, np.ndarray]] = []
 
     answers = df[["answer_id", "answervalue"]].drop_duplicates().reset_index(drop=True)
-    n_ans   = len(answers)
-    print(f"      [RESP] answers = {n_ans}")
+    print(f"      [RESP] answers = {len(answers)}")
 
-    for idx_ans, row_ans in answers.iterrows():
+    for _, row_ans in answers.iterrows():
         answer_id = row_ans["answer_id"]
         ans_val   = row_ans["answervalue"]
 
-        sup_ans = df[df["answer_id"] == answer_id].copy()
-        sup_ans["tuple_id"] = sup_ans["relation"] + "#" + sup_ans["pk"]
+        sup_ans = df[df["answer_id"] == answer_id]
 
-        uniq_tuples = sup_ans["tuple_id"].drop_duplicates().tolist()
-        tid2idx = {tid: i for i, tid in enumerate(uniq_tuples)}
+        # columns of M in order of first appearance
+        tuple_idx, uniq_tuples = pd.factorize(sup_ans["tuple_id"].to_numpy())
         n = len(uniq_tuples)
 
-        support_sets: List[Set[int]] = []
-        for _, g in sup_ans.groupby("support_id"):
-            S = {tid2idx[tid] for tid in g["tuple_id"]}
-            if S:
-                support_sets.append(S)
-
-        if n == 0 or not support_sets:
-            out_rows.append({
-                "scale":  scale,
-                "subset": subset,
-                "ratio":  ratio,
-                "seed":   seed,
-                "qname":  qname,
-                "answer_id":   int(answer_id),
-                "answervalue": ans_val,
-                "icqa_resp_cbm": 0.0,
-                "icqa_resp_cim": 0.0,
-                "icqa_resp_pim": 0.0,
-                "icqa_resp_rim": 0.0,
-            })
-            continue
+        _, sup_inv = np.unique(sup_ans["support_id"].to_numpy(), return_inverse=True)
+        M = np.zeros((int(sup_inv.max()) + 1 if n else 0, n), dtype=bool)
+        M[sup_inv, tuple_idx] = True
 
-        tuple_meta = sup_ans[["relation", "pk", "tuple_id"]].drop_duplicates()
-        tm_ans = tm_db.merge(tuple_meta, on=["relation", "pk"], how="inner")
-        if tm_ans.empty:
-            out_rows.append({
-                "scale":  scale,
-                "subset": subset,
-                "ratio":  ratio,
-                "seed":   seed,
-                "qname":  qname,
-                "answer_id":   int(answer_id),
-                "answervalue": ans_val,
-                "icqa_resp_cbm": 0.0,
-                "icqa_resp_cim": 0.0,
-                "icqa_resp_pim": 0.0,
-                "icqa_resp_rim": 0.0,
-            })
-            continue
+        V = V_q[uniq_tuples]
 
-        if (idx_ans % 5) == 0:
-            print(f"         [RESP] answer {idx_ans+1}/{n_ans}, tuples={n}, supports={len(support_sets)}")
-
-        rho: Dict[str, float] = {}
-        for tid, idx_t in tid2idx.items():
-            h_star = min_hitting_set_size_for_t(support_sets, n, idx_t)
-            rho[tid] = 1.0 / (1 + h_star) if h_star is not None else 0.0
-
-        icqa = {m: 0.0 for m in MEASURES}
-        for _, r in tm_ans.iterrows():
-            tid = r["tuple_id"]
-            m   = str(r["measure"]).upper()
-            if m not in icqa:
-                continue
-            v = float(r["value"])
-            w = rho.get(tid, 0.0)
-            icqa[m] += w * v
-
-        out_rows.append({
+        out_row = {
             "scale":  scale,
             "subset": subset,
             "ratio":  ratio,
@@ -200,34 +346,98 @@ def compute_resp_for_query(
             "qname":  qname,
             "answer_id":   int(answer_id),
             "answervalue": ans_val,
-            "icqa_resp_cbm": icqa["CBM"],
-            "icqa_resp_cim": icqa["CIM"],
-            "icqa_resp_pim": icqa["PIM"],
-            "icqa_resp_rim": icqa["RIM"],
-        })
+        }
+        payloads.append((out_row, M, V))
 
-    return out_rows
+    return payloads
+
+
+def _solve_answer(payload: Tuple[Dict[str, Any], np.ndarray, np.ndarray]) -> Dict[str, Any]:
+    """
+    Exact responsibility-based ICQA of one answer (runs in a worker process):
+        ICQA_resp^m = sum_t rho(t) * im_m(t) = rho @ V
+    """
+    out_row, M, V = payload
+
+    icqa = np.zeros(len(MEASURES))
+    if M.shape[0] > 0 and V.any():
+        # rho(t) only matters for tuples with a nonzero measure;
+        # a tuple in every support has S^-t = {} -> h* = 0 -> rho = 1
+        rho = M.all(axis=0).astype(float)
+        todo = np.flatnonzero(V.any(axis=1) & (rho == 0.0))
+        if M.shape[1] <= BITSET_MAX_TUPLES:
+            h = bitset_h_star(support_masks(M), todo, BITSET_NODE_BUDGET)
+        else:
+            h = np.full(todo.shape[0], -1)
+        for idx_t, h_star in zip(todo, h):
+            if h_star < 0:
+                h_star = min_hitting_set_size_for_t(M, idx_t)
+            rho[idx_t] = 1.0 / (1 + h_star)
+        icqa = rho @ V
+
+    out_row = dict(out_row)
+    for j, m in enumerate(MEASURES):
+        out_row[f"icqa_resp_{m.lower()}"] = float(icqa[j])
+    return out_row
 
 
 def main():
     print("[INFO] Aggregator = resp (exact responsibility)")
-    print(f"[INFO] support_all      : {SUPPORT_ALL_FILE}")
+    print(f"[INFO] support_all      : {SUPPORT_VIEW_FILE}")
     print(f"[INFO] tuple_measures   : {TUPLE_MEASURES_FILE}")
     print(f"[INFO] output parquet   : {OUT_FILE}")
 
     con = duckdb.connect()
 
-    db_list = con.execute(f"""
+    # the supports and tuple_measures are loaded once into tables, so the
+    # per-DB queries below (constant SQL with bound keys) skip row groups via
+    # zone maps instead of decoding parquet again. support rows are already
+    # grouped by DB (one DB per file, files read in path order) and keep
+    # their order; tuple_measures is sorted.
+    con.execute(SUPPORT_VIEW_FILE.read_text())
+    con.execute("""
+        CREATE TABLE support_all AS
+        SELECT * FROM all_support_sets
+    """)
+    con.execute(f"""
+        CREATE TABLE tuple_measures AS
+        SELECT
+            scale,
+            subset,
+            ratio,
+            seed,
+            relation,
+            pk,
+            UPPER(measure) AS measure,
+            value
+        FROM read_parquet('{TUPLE_MEASURES_FILE.as_posix()}')
+        ORDER BY scale, subset, ratio, seed
+    """)
+
+    db_list = con.execute("""
         SELECT DISTINCT
             scale,
             subset,
             ratio,
             seed
-        FROM read_parquet('{SUPPORT_ALL_FILE.as_posix()}')
+        FROM support_all
         ORDER BY scale, subset, ratio, seed
     """).df()
 
-    all_rows: List[Dict[str, Any]] = []
+    # tuple_measures of all DBs that have supports, read in one scan
+    tm_all = con.execute("""
+        SELECT *
+        FROM tuple_measures
+        WHERE (scale, subset, ratio, seed) IN (
+            SELECT DISTINCT (scale, subset, ratio, seed) FROM support_all
+        )
+    """).df()
+    # grouped on str keys, the type of the per-DB lookups below
+    db_keys = ["scale", "subset", "ratio", "seed"]
+    tm_all[db_keys] = tm_all[db_keys].astype(str)
+    tm_by_db = dict(tuple(tm_all.groupby(db_keys, sort=False)))
+
+    payloads: List[Tuple[Dict[str, Any], np.ndarray, np.ndarray]] = []
 
     for _, db_row in db_list.iterrows():
         scale = str(db_row["scale"])
@@ -237,9 +447,9 @@ def main():
 
         print(f"\n== DB: scale={scale}, subset={subset}, ratio={ratio}, seed={seed} ==")
 
-        support_db = con.execute(f"""
+        support_db = con.execute("""
             SELECT *
-            FROM read_parquet('{SUPPORT_ALL_FILE.as_posix()}')
+            FROM support_all
             WHERE scale = ? AND subset = ? AND ratio = ? AND seed = ?
         """, [scale, subset, ratio, seed]).df()
 
@@ -247,28 +457,20 @@ def main():
             print("   [WARN] no support rows for this DB, skip.")
             continue
 
-        tm_db = con.execute(f"""
-            SELECT
-                scale,
-                subset,
-                ratio,
-                seed,
-                relation,
-                pk,
-                UPPER(measure) AS measure,
-                value
-            FROM read_parquet('{TUPLE_MEASURES_FILE.as_posix()}')
-            WHERE scale = ? AND subset = ? AND ratio = ? AND seed = ?
-        """, [scale, subset, ratio, seed]).df()
+        tm_db = tm_by_db.get((scale, subset, ratio, seed))
 
-        if tm_db.empty:
-            print("   [WARN] no tuple_measures rows for this DB, skip.")
-            continue
+        if tm_db is None or tm_db.empty:
+            raise ValueError(
+                f"no tuple_measures rows for DB scale={scale}, subset={subset}, "
+                f"ratio={ratio}, seed={seed}"
+            )
 
+        tm_db = tm_db.copy()
         support_db["rel"] = support_db["rel"].astype(str)
         support_db["pk"]  = support_db["pk"].astype(str)
         tm_db["relation"] = tm_db["relation"].astype(str)
         tm_db["pk"]       = tm_db["pk"].astype(str)
+        tm_by_key = build_tm_by_key(tm_db)
 
         for qname in QUERIES:
             support_q = support_db[support_db["qname"] == qname].copy()
@@ -278,8 +480,12 @@ def main():
 
             print(f"   [Q={qname}] support rows = {len(support_q)}")
 
-            resp_rows = compute_resp_for_query(scale, subset, ratio, seed, qname, support_q, tm_db)
-            all_rows.extend(resp_rows)
+            payloads.extend(build_resp_payloads(scale, subset, ratio, seed, qname, support_q, tm_by_key))
+
+    # answers are independent: solve them in parallel, keeping their order
+    print(f"\n[INFO] Solving {len(payloads)} answers with {N_WORKERS} worker processes")
+    with ProcessPoolExecutor(max_workers=N_WORKERS) as ex:
+        all_rows: List[Dict[str, Any]] = list(ex.map(_solve_answer, payloads, chunksize=8))
 
     if not all_rows:
         print("[WARN] No ICQA rows produced; nothing to write.")
@@ -290,8 +496,20 @@ def main():
     other_cols = [c for c in out_df.columns if c not in front_cols]
     out_df = out_df[front_cols + other_cols]
 
+    # outputs only: 32-bit answer ids and scores
+    out_df["answer_id"] = out_df["answer_id"].astype("int32")
+    for c in other_cols:
+        if c.startswith("icqa_"):
+            out_df[c] = out_df[c].astype("float32")
+
+    tbl = pa.Table.from_pandas(out_df, preserve_index=False)
+    for name in DICT_COLS:
+        i = tbl.schema.get_field_index(name)
+        tbl = tbl.set_column(i, name, tbl.column(i).dictionary_encode())
+
     print(f"\n[INFO] Writing {len(out_df)} rows to: {OUT_FILE}")
-    out_df.to_parquet(OUT_FILE, index=False)
+    pq.write_table(tbl, OUT_FILE, compression="zstd", compression_level=3,
+                   use_dictionary=True, data_page_size=1 << 20)
     con.close()
 
 
@@ -7,8 +7,8 @@ Compute ICQA_shap (Shapley-based aggregation) for selected answers.
 Inputs:
   - /Users/Desktop/tpchdata/outputs/icqa/icqa_prov.parquet
       -> use rows with non-null icqa_prov_cbm to know which answers to compute
-  - /Users/Desktop/tpchdata/support_sets/all_support_sets.parquet
-      (support sets for all DBs)
+  - /Users/Desktop/tpchdata/support_sets/all_support_sets.sql
+      (view over the support sets of all DBs)
   - /Users/Desktop/tpchdata/outputs/scores/tuple_measures.parquet
       (tuple-level inconsistency measures)
 
@@ -16,12 +16,20 @@ Output:
   - /Users/Desktop/tpchdata/outputs/icqa/icqa_shap.parquet
 """
 
+from concurrent.futures import ProcessPoolExecutor
+from functools import lru_cache
+from itertools import chain
+from math import comb
+import os
 from pathlib import Path
 from typing import List, Dict, Set, Tuple
 
 import duckdb
+import numba as nb
 import numpy as np
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 # ---------------------------------------------------------------------------
 # Configuration
@@ -30,7 +38,7 @@ import pandas as pd
 BASE = Path("/Users/Desktop/tpchdata")
 
 PROV_FILE = BASE / "outputs" / "icqa" / "icqa_prov.parquet"
-SUPPORT_FILE = BASE / "support_sets" / "all_support_sets.parquet"
+SUPPORT_VIEW_FILE = BASE / "support_sets" / "all_support_sets.sql"
 TUPLE_MEASURES_FILE = BASE / "outputs" / "scores" / "tuple_measures.parquet"
 
 OUT_DIR = BASE / "outputs" / "icqa"
@@ -39,79 +47,163 @@ OUT_FILE = OUT_DIR / "icqa_shap.parquet"
 
 MEASURES = ["CBM", "CIM", "PIM", "RIM"]
 
+# output columns; fixed up front, so a batch with an all-null column
+# cannot pin its type for the whole file
+OUT_SCHEMA = pa.schema(
+    [(c, pa.large_string()) for c in ["scale", "subset", "ratio", "seed", "qname"]]
+    + [("answer_id", pa.int64()), ("answervalue", pa.large_string())]
+    + [(f"icqa_shap_{m.lower()}", pa.float64()) for m in MEASURES]
+)
+
 # Shapley parameters
-N_EXACT = 14          # |U| <= 12 -> exact enumeration
-N_SAMPLES = 10000      # |U| > 12 -> Monte Carlo permutations
+N_EXACT = 14          # <= 14 tuple types -> exact enumeration
+N_EXACT_TUPLES = 128  # ... and |U| <= 128
+N_SAMPLES = 10000      # otherwise -> Monte Carlo permutations (at most)
+APPROX_TOL = 0.02      # ... stop early once every ICQA sum has std. error <= tol * sum
+APPROX_MIN_SAMPLES = 2000
+APPROX_CHECK_INTERVAL = 500
 RNG_SEED = 0          # for reproducibility
 
+# worker processes for the per-answer computations
+N_WORKERS = os.cpu_count() or 1
+
 
 # ---------------------------------------------------------------------------
 # Shapley helper functions
 # ---------------------------------------------------------------------------
 
-def _support_sets_to_masks(support_sets: List[Set[int]], n: int) -> List[int]:
-    """Convert support_sets (as sets of indices) to bit masks."""
-    masks = []
-    for S in support_sets:
-        m = 0
-        for i in S:
-            idx = int(i)        
-            m |= (1 << idx)
-        masks.append(m)
-    return masks
+def _support_index_pairs(support_sets: List[Set[int]]) -> Tuple[np.ndarray, np.ndarray]:
+    """(support row, tuple index) of every membership, as two flat arrays."""
+    rows = np.repeat(np.arange(len(support_sets)), [len(S) for S in support_sets])
+    cols = np.fromiter(chain.from_iterable(support_sets), dtype=np.int64, count=rows.size)
+    return rows, cols
 
 
+def _support_sets_to_masks(support_sets: List[Set[int]], n: int) -> np.ndarray:
+    """
+    Convert support_sets (as sets of indices) to bit masks: a (k, ceil(n/64))
+    uint64 matrix, bit i % 64 of word i // 64 set iff i in S (one word for n <= 64).
+    """
+    rows, cols = _support_index_pairs(support_sets)
+    masks = np.zeros((len(support_sets), max(1, (n + 63) // 64)), dtype=np.uint64)
+    np.bitwise_or.at(masks, (rows, cols >> 6), np.uint64(1) << (cols & 63).astype(np.uint64))
+    return masks
+
 
-def _compute_v_masks(support_sets: List[Set[int]], n: int) -> Tuple[List[int], List[int]]:
+def _compute_v_masks(support_sets: List[Set[int]], n: int) -> Tuple[np.ndarray, np.ndarray]:
     """
-    Precompute v_mask[mask] = 1 if coalition (bitmask) hits all supports, else 0.
+    Precompute v_mask[mask] = 1 if coalition (bitmask) hits all supports, else 0,
+    as a uint8 array over all 2^n coalitions.
+
+    C misses a support S iff S is a subset of the complement of C, so with
+    f[mask] = #supports contained in mask (zeta transform over subsets,
+    n vectorized passes): v(C) = 1 iff f[~C] == 0.
     Also return support_masks.
     """
     support_masks = _support_sets_to_masks(support_sets, n)
     size = 1 << n
-    v_mask = [0] * size
-    for mask in range(size):
-        if all(mask & sm for sm in support_masks):
-            v_mask[mask] = 1
+    f = np.bincount(support_masks[:, 0].astype(np.int64), minlength=size).astype(np.int32)
+    for i in range(n):
+        # f[mask | bit_i] += f[mask] for all masks without bit i
+        g = f.reshape(-1, 2, 1 << i)
+        g[:, 1, :] += g[:, 0, :]
+    full = size - 1
+    v_mask = (f[full - np.arange(size)] == 0).astype(np.uint8)
     return v_mask, support_masks
 
 
-def exact_shapley(support_sets: List[Set[int]], n: int) -> List[float]:
+def _player_types(support_sets: List[Set[int]], n: int) -> Tuple[np.ndarray, np.ndarray, List[Set[int]]]:
     """
-    Exact Shapley for game v(C) = 1 iff C hits all support sets.
-    Coalition representation via bitmasks, enumeration over all subsets.
+    Group tuples contained in exactly the same supports into types: such
+    tuples are interchangeable in v, so they share one Shapley value.
+    Returns type_of[t], sizes[j] (tuples per type) and the supports as
+    sets of types.
     """
-    if n == 0:
-        return []
+    incidence = np.zeros((len(support_sets), n), dtype=bool)
+    incidence[_support_index_pairs(support_sets)] = True
+    _, type_of, sizes = np.unique(incidence.T, axis=0, return_inverse=True, return_counts=True)
+    type_of = type_of.reshape(-1)
+    type_sets = [set(type_of[list(S)].tolist()) for S in support_sets]
+    return type_of, sizes, type_sets
 
-    v_mask, _ = _compute_v_masks(support_sets, n)
-    size = 1 << n
 
-    # factorials
+def _coalition_weights(sizes: np.ndarray, n: int) -> np.ndarray:
+    """
+    weight[P] for every set P of types (bitmask): sum over coalitions C of
+    tuples whose set of types is exactly P of |C|! (n-|C|-1)! / n!.
+    The number of such C per size is the coefficient list of
+    prod_{j in P} ((1+x)^{sizes[j]} - 1), built one type bit at a time.
+    """
+    m = len(sizes)
     fact = [1] * (n + 1)
     for i in range(1, n + 1):
         fact[i] = fact[i - 1] * i
-    denom = fact[n]
-
-    popcount = int.bit_count
-    phi = [0.0] * n
-
-    for t in range(n):
-        bit_t = 1 << t
-        s = 0.0
-        for mask in range(size):
-            if mask & bit_t:
-                continue
-            k = popcount(mask)
-            vC = v_mask[mask]
-            vCt = v_mask[mask | bit_t]
-            if vCt == vC:
-                continue
-            # weight for coalition size k
-            weight = fact[k] * fact[n - k - 1] / denom
-            s += weight * (vCt - vC)   # here vCt - vC ∈ {0,1}
-        phi[t] = s
+    # weight for coalition size k
+    size_weight = np.array([fact[k] * fact[n - k - 1] / fact[n] for k in range(n)])
+
+    counts = np.zeros((1 << m, n))
+    counts[0, 0] = 1.0
+    for j, n_j in enumerate(sizes):
+        g = counts.reshape(-1, 2, 1 << j, n)
+        for c in range(1, int(n_j) + 1):
+            g[:, 1, :, c:] += comb(int(n_j), c) * g[:, 0, :, :n - c]
+    return counts @ size_weight
+
+
+def exact_shapley(
+    support_sets: List[Set[int]],
+    n: int,
+    max_types: int | None = None,
+) -> List[float] | None:
+    """
+    Exact Shapley for game v(C) = 1 iff C hits all support sets.
+    Enumeration over all subsets of tuple types (see _player_types), with
+    each type set weighted by the coalitions of tuples it stands for;
+    without repeated types this is the plain enumeration over 2^n coalitions.
+    Coalition representation via bitmasks (v_mask vectorized, marginal gains
+    in a numba loop).
+    Answers with the same (n, support masks) are solved once.
+    Returns None if there are more than max_types tuple types.
+    """
+    if n == 0:
+        return []
+
+    masks = tuple(sorted({sum(1 << i for i in S) for S in support_sets}))
+    phi = _exact_shapley_cached(masks, n, max_types)
+    return None if phi is None else list(phi)
+
 
+@lru_cache(maxsize=4096)
+def _exact_shapley_cached(
+    masks: Tuple[int, ...], n: int, max_types: int | None
+) -> Tuple[float, ...] | None:
+    support_sets = [{i for i in range(n) if sm >> i & 1} for sm in masks]
+    type_of, sizes, type_sets = _player_types(support_sets, n)
+    m = len(sizes)
+    if max_types is not None and m > max_types:
+        return None
+
+    v_mask, _ = _compute_v_masks(type_sets, m)
+    weight = _coalition_weights(sizes, n)
+
+    return tuple(_exact_phi_nb(v_mask, weight, m)[type_of].tolist())
+
+
+@nb.njit(cache=True)
+def _exact_phi_nb(v_mask, weight, n):
+    """
+    phi[t] = sum over coalitions C without t of weight[C] * (v(C+t) - v(C)).
+    v is monotone, so only losing coalitions C can gain.
+    """
+    phi = np.zeros(n)
+    for mask in range(1 << n):
+        if v_mask[mask]:
+            continue
+        w = weight[mask]
+        for t in range(n):
+            bit_t = 1 << t
+            if not (mask & bit_t) and v_mask[mask | bit_t]:
+                phi[t] += w
     return phi
 
 
@@ -119,8 +211,20 @@ def approx_shapley(
     support_sets: List[Set[int]],
     n: int,
     num_samples: int = N_SAMPLES,
-    rng: np.random.Generator | None = None
+    rng: np.random.Generator | None = None,
+    tol: float = APPROX_TOL,
+    weights: np.ndarray | None = None,
 ) -> List[float]:
+    """
+    Monte Carlo Shapley: phi[t] = fraction of random permutations in which
+    t completes a coalition hitting all supports. Every permutation has
+    exactly one such pivot, so sum_t phi(t) * w(t) is the sample mean of
+    w(pivot), with standard error sqrt((E[w^2] - E[w]^2) / samples).
+    Sampling stops once that error is <= tol * the sum for every column of
+    `weights` (n x k, the tuple measures) with a positive sum; without
+    weights, for every phi[t] > 0. Tuples never seen pivotal (null players)
+    do not hold the rule open.
+    """
     if n == 0:
         return []
 
@@ -129,36 +233,66 @@ def approx_shapley(
 
     support_masks = _support_sets_to_masks(support_sets, n)
     counts = np.zeros(n, dtype=float)
+    done = 0
+
+    # permutations in batches of APPROX_CHECK_INTERVAL (row-wise argsort of
+    # uniform keys); after APPROX_MIN_SAMPLES, stop once every positive
+    # weighted sum has standard error <= tol * sum
+    while done < num_samples:
+        batch = min(APPROX_CHECK_INTERVAL, num_samples - done)
+        perms = rng.random((batch, n)).argsort(axis=1)
+        counts += _approx_counts_nb(support_masks, perms)
+        done += batch
+
+        if done < APPROX_MIN_SAMPLES:
+            continue
+        p = counts / done
+        if weights is None:
+            mean, sq = p, p
+        else:
+            mean, sq = p @ weights, p @ (weights * weights)
+        se = np.sqrt(np.maximum(sq - mean * mean, 0.0) / done)
+        pos = mean > 0
+        if np.all(se[pos] <= tol * mean[pos]):
+            break
 
-    for _ in range(num_samples):
-        perm = rng.permutation(n)
-        coalition_mask = 0
-        vC = 0  # current v(C): 0 or 1
-
-        for idx in perm:
-            idx = int(idx)            
-            if vC:
-                break
-
-            coalition_mask |= (1 << idx)
+    phi = (counts / done).tolist()
+    return phi
 
-            hit = True
-            for sm in support_masks:
-                if not (coalition_mask & sm):
-                    hit = False
-                    break
-            new_vC = 1 if hit else 0
 
-            if (not vC) and new_vC:
+@nb.njit(cache=True)
+def _approx_counts_nb(support_masks, perms):
+    """
+    counts[t] = number of permutations in which t is the first element
+    whose arrival makes the coalition hit all supports.
+    Supports not hit yet are compacted in place in `unhit`; each arrival
+    drops the ones it hits, so the coalition wins once `unhit` is empty.
+    support_masks: (k, words) uint64 matrix from _support_sets_to_masks.
+    """
+    counts = np.zeros(perms.shape[1])
+    unhit = np.empty_like(support_masks)
+
+    for r in range(perms.shape[0]):
+        unhit[:, :] = support_masks
+        n_unhit = unhit.shape[0]
+
+        for j in range(perms.shape[1]):
+            idx = perms[r, j]
+            word = idx >> 6
+            bit = np.uint64(1) << np.uint64(idx & 63)
+
+            kept = 0
+            for i in range(n_unhit):
+                if unhit[i, word] & bit == 0:
+                    unhit[kept, :] = unhit[i, :]
+                    kept += 1
+            n_unhit = kept
+
+            if n_unhit == 0:
                 counts[idx] += 1.0
-                vC = new_vC
                 break
 
-            vC = new_vC
-
-    phi = (counts / num_samples).tolist()
-    return phi
-
+    return counts
 
 
 # ---------------------------------------------------------------------------
@@ -178,19 +312,15 @@ def compute_icqa_shap_for_answer(
 ) -> Dict[str, object]:
     """
     Compute ICQA_shap^m(q, answer) for this single answer.
-    support_ans: rows of support_sets for this DB + qname + answer_id.
+    support_ans: rows of support_sets for this DB + qname + answer_id,
+                 with relation / pk / tuple_id columns (see main).
     tm_db: tuple_measures for this DB.
     """
-    # tuple_id
-    support_ans = support_ans.copy()
-    support_ans["relation"] = support_ans["rel"].astype(str)
-    support_ans["pk"] = support_ans["pk"].astype(str)
-    support_ans["tuple_id"] = support_ans["relation"] + "#" + support_ans["pk"]
-
     answervalue = support_ans["answervalue"].iloc[0]
 
-    # universe U
-    uniq_tuples = support_ans["tuple_id"].drop_duplicates().tolist()
+    # universe U, sorted: the support rows come unordered, and the seeded
+    # Monte Carlo permutations are drawn over these player indices
+    uniq_tuples = sorted(support_ans["tuple_id"].unique())
     tid2idx = {tid: i for i, tid in enumerate(uniq_tuples)}
     n = len(uniq_tuples)
 
@@ -205,31 +335,34 @@ def compute_icqa_shap_for_answer(
         # degenerate: no tuples/supports -> ICQA_shap = 0
         icqa = {m: 0.0 for m in MEASURES}
     else:
-        # Shapley weights for tuples
-        if n <= N_EXACT:
-            phi_list = exact_shapley(support_sets, n)
-        else:
-            phi_list = approx_shapley(support_sets, n, num_samples=N_SAMPLES, rng=rng)
-
-        # map back to tuple_id
-        phi_by_tid = {tid: phi_list[idx] for tid, idx in tid2idx.items()}
-
         # restrict tuple_measures to tuples in this answer
         tuple_meta = support_ans[["relation", "pk", "tuple_id"]].drop_duplicates()
         tm_ans = tm_db.merge(tuple_meta, on=["relation", "pk"], how="inner")
+        measure_upper = tm_ans["measure"].astype(str).str.upper()
+
+        # Shapley weights for tuples: exact up to N_EXACT tuple types
+        phi_list = None
+        if n <= N_EXACT_TUPLES:
+            phi_list = exact_shapley(support_sets, n, max_types=N_EXACT)
+        if phi_list is None:
+            # im_m(t) per player, so sampling stops on the ICQA sums' accuracy
+            im = (
+                tm_ans["value"].astype(float)
+                .groupby([tm_ans["tuple_id"], measure_upper]).sum()
+                .unstack()
+                .reindex(index=uniq_tuples, columns=MEASURES)
+                .fillna(0.0)
+                .to_numpy()
+            )
+            phi_list = approx_shapley(support_sets, n, num_samples=N_SAMPLES, rng=rng, weights=im)
 
-        if tm_ans.empty:
-            icqa = {m: 0.0 for m in MEASURES}
-        else:
-            icqa = {m: 0.0 for m in MEASURES}
-            for _, r in tm_ans.iterrows():
-                tid = r["tuple_id"]
-                m = str(r["measure"]).upper()
-                if m not in icqa:
-                    continue
-                w = phi_by_tid.get(tid, 0.0)
-                v = float(r["value"])
-                icqa[m] += w * v
+        # map back to tuple_id
+        phi_by_tid = pd.Series(phi_list, index=uniq_tuples)
+
+        # ICQA_shap^m = sum_t phi(t) * im_m(t)
+        w = tm_ans["tuple_id"].map(phi_by_tid).fillna(0.0)
+        wv = (w * tm_ans["value"].astype(float)).groupby(measure_upper).sum()
+        icqa = {m: float(wv.get(m, 0.0)) for m in MEASURES}
 
     row = {
         "scale": scale,
@@ -246,6 +379,26 @@ def compute_icqa_shap_for_answer(
     return row
 
 
+def _process_answer(payload) -> Dict[str, object]:
+    """
+    compute_icqa_shap_for_answer for one payload (runs in a worker process).
+    Each answer gets its own generator seeded by (RNG_SEED, task index), so
+    estimates do not depend on the number of workers.
+    """
+    scale, subset, ratio, seed, qname, answer_id, sup_ans, tm_ans, task_idx = payload
+    return compute_icqa_shap_for_answer(
+        scale=scale,
+        subset=subset,
+        ratio=ratio,
+        seed=seed,
+        qname=qname,
+        answer_id=answer_id,
+        support_ans=sup_ans,
+        tm_db=tm_ans,
+        rng=np.random.default_rng([RNG_SEED, int(task_idx)]),
+    )
+
+
 # ---------------------------------------------------------------------------
 # Main
 # ---------------------------------------------------------------------------
@@ -253,7 +406,11 @@ def compute_icqa_shap_for_answer(
 def main():
     print("[INFO] Starting ICQA Shapley computation")
 
+    # the support view and tuple_measures are scanned once per DB below: keep
+    # the parquet footers cached instead of re-reading them every time
     con = duckdb.connect()
+    con.execute("SET parquet_metadata_cache = true")
+    con.execute(SUPPORT_VIEW_FILE.read_text())
 
     # 1. (scale, subset, ratio, seed, qname, answer_id)
     tasks = con.execute(f"""
@@ -274,117 +431,128 @@ def main():
         print("[WARN] No tasks found (no non-null icqa_prov_cbm). Nothing to do.")
         return
 
-    rng = np.random.default_rng(RNG_SEED)
-    all_rows: List[Dict[str, object]] = []
+    # answers to compute, for the per-DB support query
+    con.register("tasks", tasks)
+
+    # rows are written per DB, so only one DB's results are held in memory;
+    # they go to a temp file that replaces OUT_FILE only once the run is
+    # complete, so a failed run leaves no partial output behind
+    tmp_file = OUT_FILE.with_suffix(".tmp")
+    writer = None
+    n_written = 0
+
+    def write_rows(rows: List[Dict[str, object]]):
+        nonlocal writer, n_written
+        if not rows:
+            return
+        out_df = pd.DataFrame(rows)
+        tbl = pa.Table.from_pandas(out_df[OUT_SCHEMA.names], schema=OUT_SCHEMA, preserve_index=False)
+        if writer is None:
+            writer = pq.ParquetWriter(tmp_file, OUT_SCHEMA, compression="zstd")
+        writer.write_table(tbl)
+        n_written += len(rows)
 
     # group by DB
     grouped = tasks.groupby(["scale", "subset", "ratio", "seed"], as_index=False)
 
-    for _, db_grp in grouped:
-        scale = db_grp["scale"].iloc[0]
-        subset = db_grp["subset"].iloc[0]
-        ratio = db_grp["ratio"].iloc[0]
-        seed = db_grp["seed"].iloc[0]
+    try:
+        with ProcessPoolExecutor(max_workers=N_WORKERS) as ex:
+            for _, db_grp in grouped:
+                scale = db_grp["scale"].iloc[0]
+                subset = db_grp["subset"].iloc[0]
+                ratio = db_grp["ratio"].iloc[0]
+                seed = db_grp["seed"].iloc[0]
+
+                print(f"[DB] scale={scale}, subset={subset}, ratio={ratio}, seed={seed}")
+
+                # (qname, answer_id) for current DB
+                qa_list = db_grp[["qname", "answer_id"]].drop_duplicates()
+
+                # read support_sets (only rows of answers to compute) & tuple_measures for this DB
+                support_db = con.execute("""
+                    SELECT s.*
+                    FROM all_support_sets s
+                    SEMI JOIN tasks t USING (scale, subset, ratio, seed, qname, answer_id)
+                    WHERE s.scale = ? AND s.subset = ? AND s.ratio = ? AND s.seed = ?
+                """, [scale, subset, ratio, seed]).df()
+
+                if support_db.empty:
+                    print("   [WARN] No support rows for this DB, skip.")
+                    continue
 
-        print(f"[DB] scale={scale}, subset={subset}, ratio={ratio}, seed={seed}")
+                tm_db = con.execute(f"""
+                    SELECT
+                        scale,
+                        subset,
+                        ratio,
+                        seed,
+                        relation,
+                        pk,
+                        UPPER(measure) AS measure,
+                        value
+                    FROM read_parquet('{TUPLE_MEASURES_FILE.as_posix()}')
+                    WHERE scale = ? AND subset = ? AND ratio = ? AND seed = ?
+                """, [scale, subset, ratio, seed]).df()
+
+                # tuple_id, built once per DB
+                support_db["relation"] = support_db["rel"].astype(str)
+                support_db["pk"] = support_db["pk"].astype(str)
+                support_db["tuple_id"] = support_db["relation"] + "#" + support_db["pk"]
+
+                # shared categorical (relation, pk) dtypes: the per-answer merges
+                # with tm_db compare integer codes instead of hashing strings
+                for col in ["relation", "pk"]:
+                    tm_db[col] = tm_db[col].astype(str)
+                    cat = pd.CategoricalDtype(pd.unique(pd.concat([support_db[col], tm_db[col]])))
+                    support_db[col] = support_db[col].astype(cat)
+                    tm_db[col] = tm_db[col].astype(cat)
+
+                # support rows per (qname, answer_id), split once
+                sup_by_answer = dict(tuple(support_db.groupby(["qname", "answer_id"], sort=False)))
+
+                if tm_db.empty:
+                    print("   [WARN] No tuple_measures rows for this DB, all ICQA_shap=0.")
+                    firsts = support_db.drop_duplicates(["qname", "answer_id"])[["qname", "answer_id", "answervalue"]]
+                    out = qa_list.merge(firsts, on=["qname", "answer_id"], how="inner").assign(
+                        scale=scale, subset=subset, ratio=ratio, seed=seed,
+                        **{f"icqa_shap_{m.lower()}": 0.0 for m in MEASURES},
+                    )
+                    cols = ["scale", "subset", "ratio", "seed", "qname", "answer_id", "answervalue"]
+                    write_rows(out[cols + [f"icqa_shap_{m.lower()}" for m in MEASURES]].to_dict("records"))
+                    continue
 
-        # (qname, answer_id) for current DB
-        qa_list = db_grp[["qname", "answer_id"]].drop_duplicates()
+                # normal case: support_db & tm_db both non-empty
+                payloads = []
+                for idx, row in qa_list.iterrows():
+                    qname = row["qname"]
+                    answer_id = row["answer_id"]
 
-        # read support_sets & tuple_measures for this DB
-        support_db = con.execute(f"""
-            SELECT *
-            FROM read_parquet('{SUPPORT_FILE.as_posix()}')
-            WHERE scale = ? AND subset = ? AND ratio = ? AND seed = ?
-        """, [scale, subset, ratio, seed]).df()
+                    sup_ans = sup_by_answer.get((qname, answer_id))
+                    if sup_ans is None:
+                        print(f"   [Q={qname}, ans={answer_id}] no support rows, skip.")
+                        continue
 
-        if support_db.empty:
-            print("   [WARN] No support rows for this DB, skip.")
-            continue
+                    print(f"   [Q={qname}, ans={answer_id}] support rows = {len(sup_ans)}")
 
-        tm_db = con.execute(f"""
-            SELECT
-                scale,
-                subset,
-                ratio,
-                seed,
-                relation,
-                pk,
-                UPPER(measure) AS measure,
-                value
-            FROM read_parquet('{TUPLE_MEASURES_FILE.as_posix()}')
-            WHERE scale = ? AND subset = ? AND ratio = ? AND seed = ?
-        """, [scale, subset, ratio, seed]).df()
-
-        if tm_db.empty:
-            print("   [WARN] No tuple_measures rows for this DB, all ICQA_shap=0.")
-            for _, row in qa_list.iterrows():
-                qname = row["qname"]
-                answer_id = row["answer_id"]
-                sup_ans = support_db[
-                    (support_db["qname"] == qname) &
-                    (support_db["answer_id"] == answer_id)
-                ]
-                if sup_ans.empty:
-                    continue
-                ansv = sup_ans["answervalue"].iloc[0]
-                out = {
-                    "scale": scale,
-                    "subset": subset,
-                    "ratio": ratio,
-                    "seed": seed,
-                    "qname": qname,
-                    "answer_id": answer_id,
-                    "answervalue": ansv,
-                }
-                for m in MEASURES:
-                    out[f"icqa_shap_{m.lower()}"] = 0.0
-                all_rows.append(out)
-            continue
+                    # only the tuple_measures rows of this answer go to the worker
+                    tm_ans = tm_db.merge(sup_ans[["relation", "pk"]].drop_duplicates(), on=["relation", "pk"])
+                    payloads.append((scale, subset, ratio, seed, qname, answer_id, sup_ans, tm_ans, idx))
 
-        # normal case: support_db & tm_db both non-empty
-        for _, row in qa_list.iterrows():
-            qname = row["qname"]
-            answer_id = row["answer_id"]
-
-            sup_ans = support_db[
-                (support_db["qname"] == qname) &
-                (support_db["answer_id"] == answer_id)
-            ]
-            if sup_ans.empty:
-                print(f"   [Q={qname}, ans={answer_id}] no support rows, skip.")
-                continue
-
-            print(f"   [Q={qname}, ans={answer_id}] support rows = {len(sup_ans)}")
-
-            out_row = compute_icqa_shap_for_answer(
-                scale=scale,
-                subset=subset,
-                ratio=ratio,
-                seed=seed,
-                qname=qname,
-                answer_id=answer_id,
-                support_ans=sup_ans,
-                tm_db=tm_db,
-                rng=rng,
-            )
-            all_rows.append(out_row)
+                # answers are independent: solve them in parallel, keeping their order
+                write_rows(list(ex.map(_process_answer, payloads, chunksize=4)))
+    except BaseException:
+        if writer is not None:
+            writer.close()
+            tmp_file.unlink(missing_ok=True)
+        raise
 
-    if not all_rows:
+    if writer is None:
         print("[WARN] No ICQA_shap rows produced.")
         return
 
-    out_df = pd.DataFrame(all_rows)
-    front_cols = [
-        "scale", "subset", "ratio", "seed",
-        "qname", "answer_id", "answervalue"
-    ]
-    other_cols = [c for c in out_df.columns if c not in front_cols]
-    out_df = out_df[front_cols + other_cols]
-
-    out_df.to_parquet(OUT_FILE, index=False)
-    print(f"[INFO] Written {len(out_df)} rows to {OUT_FILE}")
-
+    writer.close()
+    os.replace(tmp_file, OUT_FILE)
+    print(f"[INFO] Written {n_written} rows to {OUT_FILE}")
 
 if __name__ == "__main__":
     main()
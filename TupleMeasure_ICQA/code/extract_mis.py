@@ -14,7 +14,13 @@ DC1, DC2, DC3, DC4 (as defined in the paper / discussion)
 
 Output
 ------
-For each DC, a JSON file containing a list of MIS.
+For each DC, a Parquet file DC*.parquet (default) with one row per
+(MIS, relation, tuple):
+
+  dc: dictionary<string>, mis_id: int64, relation: dictionary<string>,
+  pk: list<int64>
+
+With --format json, a JSON file containing a list of MIS instead.
 Each MIS is represented as a mapping from relation name to primary keys.
 
 Example MIS entry:
@@ -28,9 +34,11 @@ Example MIS entry:
 """
 
 import os
-import json
 import argparse
 import duckdb
+import orjson
+import pyarrow as pa
+import pyarrow.parquet as pq
 
 # =========================
 # DC SQL DEFINITIONS
@@ -114,12 +122,34 @@ DC_QUERIES = {
 # EXTRACTION LOGIC
 # =========================
 
-def extract_mis(con, dc_name, dc_def, out_dir):
-    """Extract all MIS for a single DC and write to JSON."""
+def write_mis_parquet(mis_list, dc_name, out_path):
+    """Flatten MIS to one row per (mis_id, relation, tuple) and write Parquet."""
+
+    mis_ids, relations, pks = [], [], []
+    for mis_id, mis in enumerate(mis_list):
+        for rel, keys in mis["tuples"].items():
+            for key in keys:
+                mis_ids.append(mis_id)
+                relations.append(rel)
+                pks.append(list(key) if isinstance(key, (list, tuple)) else [key])
+
+    tbl = pa.table({
+        "dc": pa.array([dc_name] * len(mis_ids)).dictionary_encode(),
+        "mis_id": pa.array(mis_ids, type=pa.int64()),
+        "relation": pa.array(relations, type=pa.string()).dictionary_encode(),
+        "pk": pa.array(pks, type=pa.list_(pa.int64())),
+    })
+    pq.write_table(tbl, out_path, compression="zstd")
+
+
+def extract_mis(con, dc_name, dc_def, out_dir, fmt="parquet"):
+    """Extract all MIS for a single DC and write to Parquet (or JSON)."""
 
     print(f"[INFO] Extracting MIS for {dc_name} ...")
 
-    rows = con.execute(dc_def["sql"]).fetchall()
+    # columnar fetch; tolist() turns each key column into Python ints at once
+    cols = con.execute(dc_def["sql"]).fetchnumpy()
+    rows = zip(*(c.tolist() for c in cols.values()))
 
     mis_list = []
     for r in rows:
@@ -130,10 +160,14 @@ def extract_mis(con, dc_name, dc_def, out_dir):
         mis_list.append(mis)
 
     os.makedirs(out_dir, exist_ok=True)
-    out_path = os.path.join(out_dir, f"{dc_name}.json")
+    out_path = os.path.join(out_dir, f"{dc_name}.{fmt}")
 
-    with open(out_path, "w", encoding="utf-8") as f:
-        json.dump(mis_list, f, indent=2)
+    if fmt == "parquet":
+        write_mis_parquet(mis_list, dc_name, out_path)
+    else:
+        # orjson writes UTF-8 bytes; same JSON list as before
+        with open(out_path, "wb") as f:
+            f.write(orjson.dumps(mis_list, option=orjson.OPT_INDENT_2))
 
     print(f"[OK] {dc_name}: {len(mis_list)} MIS written to {out_path}")
 
@@ -142,18 +176,25 @@ def extract_mis(con, dc_name, dc_def, out_dir):
 # MAIN
 # =========================
 
+def run_one(db_path, out_dir, fmt="parquet", duckdb_config=None):
+    """Extract the MIS of every DC from one violated DB into out_dir."""
+    con = duckdb.connect(db_path, read_only=True, config=duckdb_config or {})
+
+    for dc_name, dc_def in DC_QUERIES.items():
+        extract_mis(con, dc_name, dc_def, out_dir, fmt)
+
+    con.close()
+
+
 def main():
     parser = argparse.ArgumentParser()
     parser.add_argument("--db", required=True, help="Path to violated DuckDB database")
-    parser.add_argument("--out", required=True, help="Output directory for MIS JSON files")
+    parser.add_argument("--out", required=True, help="Output directory for MIS files")
+    parser.add_argument("--format", choices=["parquet", "json"], default="parquet",
+                        help="MIS file format (json kept for back-compat)")
     args = parser.parse_args()
 
-    con = duckdb.connect(args.db, read_only=True)
-
-    for dc_name, dc_def in DC_QUERIES.items():
-        extract_mis(con, dc_name, dc_def, args.out)
-
-    con.close()
+    run_one(args.db, args.out, args.format)
     print("[DONE] MIS extraction completed.")
 
 
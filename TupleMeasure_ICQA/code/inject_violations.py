@@ -18,7 +18,7 @@ Ratios (of a base table size) supported:
 Design choices (important):
   - To reduce cross-DC interference, DC1/DC2/DC3 injections only UPDATE lineitem.
     DC4 injections UPDATE partsupp.
-  - Deterministic selection uses Python's random.Random(seed) on candidate keys.
+  - Deterministic selection inside DuckDB: candidates ordered by md5(key, seed), first n kept.
   - After injection, we export MIS by enumerating ALL violating witnesses for each DC.
 
 JSONL format (one MIS per line):
@@ -37,15 +37,18 @@ from __future__ import annotations
 print("### RUNNING inject_violations.py FROM:", __file__)
 
 import argparse
-import json
 import math
 import os
 import shutil
+import subprocess
+import sys
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
-from datetime import datetime
-from typing import Dict, Iterable, List, Sequence, Tuple
+from datetime import datetime, timezone
+from typing import Dict, List, Sequence
 
 import duckdb
+import orjson
 
 
 # -------------------------
@@ -112,14 +115,29 @@ def ensure_dir(path: str) -> None:
     os.makedirs(path, exist_ok=True)
 
 
-def jsonl_write(path: str, records: Iterable[dict]) -> int:
-    """Write records as JSONL. Returns number of lines written."""
-    n = 0
-    with open(path, "w", encoding="utf-8") as f:
-        for rec in records:
-            f.write(json.dumps(rec, ensure_ascii=False) + "\n")
-            n += 1
-    return n
+def clone_db(src: str, dst: str) -> None:
+    """Copy the clean DB, as a copy-on-write clone where the filesystem supports it.
+
+    Linux: cp --reflink=auto (Btrfs/XFS reflink, plain copy otherwise);
+    macOS: cp -c (APFS clonefile). Falls back to shutil.copyfile.
+    """
+    if sys.platform.startswith("linux"):
+        cmd = ["cp", "--reflink=auto", src, dst]
+    elif sys.platform == "darwin":
+        cmd = ["cp", "-c", src, dst]
+    else:
+        cmd = None
+    if cmd is not None and subprocess.run(cmd, capture_output=True).returncode == 0:
+        return
+    shutil.copyfile(src, dst)
+
+
+def total_memory_bytes() -> int | None:
+    """Physical memory of the machine, or None where sysconf does not report it."""
+    try:
+        return os.sysconf("SC_PAGE_SIZE") * os.sysconf("SC_PHYS_PAGES")
+    except (AttributeError, ValueError, OSError):
+        return None
 
 
 def count_rows(con: duckdb.DuckDBPyConnection, table: str) -> int:
@@ -132,16 +150,28 @@ def fetchall(con: duckdb.DuckDBPyConnection, sql: str, params: Sequence | None =
     return con.execute(sql, params).fetchall()
 
 
-def sample_keys(keys: List[tuple], n: int, seed: int) -> List[tuple]:
-    import random
+def sample_sql(candidates_sql: str, key_cols: Sequence[str]) -> str:
+    """Sampling subquery over the candidates: order by md5(key, seed), keep the first n.
+
+    md5 of the key text is fixed across DuckDB versions (hash() is not), so a
+    seed picks the same tuples independently of the DuckDB version and of the
+    row order. Takes the parameters [seed, n]; used as the FROM input of the
+    injecting UPDATE.
+    """
+    keys = ", ".join(key_cols)
+    return f"""
+        SELECT {keys}
+        FROM ({candidates_sql}) cand
+        ORDER BY md5(concat_ws(',', {keys}, ?::BIGINT)), {keys}
+        LIMIT ?
+    """
+
 
-    if n <= 0 or not keys:
-        return []
-    n = min(n, len(keys))
-    rng = random.Random(seed)
-    # random.sample preserves no order; we keep it deterministic by sorting afterwards.
-    picked = rng.sample(keys, n)
-    return picked
+def update_sampled(con: duckdb.DuckDBPyConnection, update_sql: str, n: int, seed: int) -> int:
+    """Run a sample-driven UPDATE ... RETURNING; returns the number of rows changed."""
+    if n <= 0:
+        return 0
+    return len(fetchall(con, update_sql, [seed, n]))
 
 
 def safe_ratio_count(base: int, ratio: float) -> int:
@@ -164,26 +194,26 @@ def inject_dc1(con: duckdb.DuckDBPyConnection, n: int, seed: int) -> InjectResul
 
     Inject by setting receiptdate = shipdate - 1 day for selected lineitems.
     """
-    candidates = fetchall(
-        con,
+    picked = sample_sql(
         """
-        SELECT l_orderkey::BIGINT, l_linenumber::BIGINT
+        SELECT l_orderkey::BIGINT AS ok, l_linenumber::BIGINT AS ln
         FROM lineitem
         WHERE CAST(l_receiptdate AS DATE) >= CAST(l_shipdate AS DATE)
         """,
+        ["ok", "ln"],
+    )
+    applied = update_sampled(
+        con,
+        f"""
+        UPDATE lineitem
+        SET l_receiptdate = CAST(l_shipdate AS DATE) - INTERVAL 1 DAY
+        FROM ({picked}) pk
+        WHERE lineitem.l_orderkey = pk.ok AND lineitem.l_linenumber = pk.ln
+        RETURNING l_orderkey, l_linenumber
+        """,
+        n,
+        seed,
     )
-    picked = sample_keys(candidates, n, seed)
-    applied = 0
-    for (ok, ln) in picked:
-        con.execute(
-            """
-            UPDATE lineitem
-            SET l_receiptdate = CAST(l_shipdate AS DATE) - INTERVAL 1 DAY
-            WHERE l_orderkey = ? AND l_linenumber = ?
-            """,
-            [ok, ln],
-        )
-        applied += 1
     return InjectResult("DC1", n, applied)
 
 
@@ -193,31 +223,28 @@ def inject_dc2(con: duckdb.DuckDBPyConnection, n: int, seed: int) -> InjectResul
     Inject by setting lineitem.commitdate = orders.orderdate - 1 day for selected lineitems.
     This avoids touching orders and reduces ripple effects.
     """
-    candidates = fetchall(
-        con,
+    picked = sample_sql(
         """
-        SELECT l.l_orderkey::BIGINT, l.l_linenumber::BIGINT
+        SELECT l.l_orderkey::BIGINT AS ok, l.l_linenumber::BIGINT AS ln
         FROM lineitem l
         JOIN orders o ON l.l_orderkey = o.o_orderkey
         WHERE CAST(l.l_commitdate AS DATE) >= CAST(o.o_orderdate AS DATE)
         """,
+        ["ok", "ln"],
+    )
+    applied = update_sampled(
+        con,
+        f"""
+        UPDATE lineitem
+        SET l_commitdate = CAST(o.o_orderdate AS DATE) - INTERVAL 1 DAY
+        FROM ({picked}) pk, orders o
+        WHERE lineitem.l_orderkey = pk.ok AND lineitem.l_linenumber = pk.ln
+          AND o.o_orderkey = lineitem.l_orderkey
+        RETURNING l_orderkey, l_linenumber
+        """,
+        n,
+        seed,
     )
-    picked = sample_keys(candidates, n, seed)
-    applied = 0
-    for (ok, ln) in picked:
-        con.execute(
-            """
-            UPDATE lineitem
-            SET l_commitdate = (
-                SELECT CAST(o.o_orderdate AS DATE) - INTERVAL 1 DAY
-                FROM orders o
-                WHERE o.o_orderkey = lineitem.l_orderkey
-            )
-            WHERE l_orderkey = ? AND l_linenumber = ?
-            """,
-            [ok, ln],
-        )
-        applied += 1
     return InjectResult("DC2", n, applied)
 
 
@@ -227,28 +254,28 @@ def inject_dc3(con: duckdb.DuckDBPyConnection, n: int, seed: int) -> InjectResul
     Inject by picking lineitems whose order is already 'F' and whose linestatus is 'F',
     then flipping linestatus to 'O'.
     """
-    candidates = fetchall(
-        con,
+    picked = sample_sql(
         """
-        SELECT l.l_orderkey::BIGINT, l.l_linenumber::BIGINT
+        SELECT l.l_orderkey::BIGINT AS ok, l.l_linenumber::BIGINT AS ln
         FROM lineitem l
         JOIN orders o ON l.l_orderkey = o.o_orderkey
         WHERE o.o_orderstatus = 'F'
           AND l.l_linestatus = 'F'
         """,
+        ["ok", "ln"],
+    )
+    applied = update_sampled(
+        con,
+        f"""
+        UPDATE lineitem
+        SET l_linestatus = 'O'
+        FROM ({picked}) pk
+        WHERE lineitem.l_orderkey = pk.ok AND lineitem.l_linenumber = pk.ln
+        RETURNING l_orderkey, l_linenumber
+        """,
+        n,
+        seed,
     )
-    picked = sample_keys(candidates, n, seed)
-    applied = 0
-    for (ok, ln) in picked:
-        con.execute(
-            """
-            UPDATE lineitem
-            SET l_linestatus = 'O'
-            WHERE l_orderkey = ? AND l_linenumber = ?
-            """,
-            [ok, ln],
-        )
-        applied += 1
     return InjectResult("DC3", n, applied)
 
 
@@ -261,10 +288,9 @@ def inject_DC4(con: duckdb.DuckDBPyConnection, n: int, seed: int) -> InjectResul
     This tends to create many MIS because one (ps_partkey, ps_suppkey) can be referenced by
     multiple lineitems.
     """
-    candidates = fetchall(
-        con,
+    picked = sample_sql(
         """
-        SELECT DISTINCT ps.ps_partkey::BIGINT, ps.ps_suppkey::BIGINT
+        SELECT DISTINCT ps.ps_partkey::BIGINT AS pk, ps.ps_suppkey::BIGINT AS sk
         FROM partsupp ps
         JOIN lineitem l
           ON l.l_partkey = ps.ps_partkey
@@ -273,19 +299,20 @@ def inject_DC4(con: duckdb.DuckDBPyConnection, n: int, seed: int) -> InjectResul
           ON p.p_partkey = ps.ps_partkey
         WHERE ps.ps_availqty >= 0
         """,
+        ["pk", "sk"],
+    )
+    applied = update_sampled(
+        con,
+        f"""
+        UPDATE partsupp
+        SET ps_availqty = -ABS(CAST(ps_availqty AS BIGINT)) - 1
+        FROM ({picked}) k
+        WHERE partsupp.ps_partkey = k.pk AND partsupp.ps_suppkey = k.sk
+        RETURNING ps_partkey, ps_suppkey
+        """,
+        n,
+        seed,
     )
-    picked = sample_keys(candidates, n, seed)
-    applied = 0
-    for (pk, sk) in picked:
-        con.execute(
-            """
-            UPDATE partsupp
-            SET ps_availqty = -ABS(CAST(ps_availqty AS BIGINT)) - 1
-            WHERE ps_partkey = ? AND ps_suppkey = ?
-            """,
-            [pk, sk],
-        )
-        applied += 1
     return InjectResult("DC4", n, applied)
 
 
@@ -293,79 +320,52 @@ def inject_DC4(con: duckdb.DuckDBPyConnection, n: int, seed: int) -> InjectResul
 # MIS export
 # -------------------------
 
+# Tuples of one MIS per DC: (table, pk columns of the DC's witness query).
+MIS_TUPLES = {
+    "DC1": [("lineitem", ["l_orderkey", "l_linenumber"])],
+    "DC2": [("orders", ["o_orderkey"]), ("lineitem", ["l_orderkey", "l_linenumber"])],
+    "DC3": [("orders", ["o_orderkey"]), ("lineitem", ["l_orderkey", "l_linenumber"])],
+    "DC4": [
+        ("lineitem", ["l_orderkey", "l_linenumber"]),
+        ("partsupp", ["ps_partkey", "ps_suppkey"]),
+        ("part", ["p_partkey"]),
+    ],
+}
+
+MIS_SQL = {"DC1": SQL_DC1_MIS, "DC2": SQL_DC2_MIS, "DC3": SQL_DC3_MIS, "DC4": SQL_DC4_MIS}
+
+
+def copy_mis_jsonl(con: duckdb.DuckDBPyConnection, dc: str, path: str) -> int:
+    """Write all MIS of one DC as JSONL with DuckDB's JSON writer. Returns number of lines written.
+
+    pk structs differ per table, so each pk is a JSON value inside the tuples list.
+    """
+    tuples_sql = ", ".join(
+        f"""struct_pack("table" := '{table}', pk := to_json(struct_pack({", ".join(f"{c} := w.{c}" for c in cols)})))"""
+        for table, cols in MIS_TUPLES[dc]
+    )
+    path_sql = path.replace("'", "''")
+    return int(
+        con.execute(
+            f"""
+            COPY (
+                SELECT '{dc}' AS dc, [{tuples_sql}] AS tuples
+                FROM ({MIS_SQL[dc]}) w
+            ) TO '{path_sql}' (FORMAT JSON)
+            """
+        ).fetchone()[0]
+    )
+
+
 def export_mis(con: duckdb.DuckDBPyConnection, out_dir: str, dcs: Sequence[str]) -> Dict[str, int]:
     """Export all MIS per DC into JSONL files. Returns {dc: count}."""
     ensure_dir(out_dir)
 
     counts: Dict[str, int] = {}
 
-    if "DC1" in dcs:
-        rows = fetchall(con, SQL_DC1_MIS)
-        path = os.path.join(out_dir, "mis_DC1.jsonl")
-        counts["DC1"] = jsonl_write(
-            path,
-            (
-                {
-                    "dc": "DC1",
-                    "tuples": [
-                        {"table": "lineitem", "pk": {"l_orderkey": int(ok), "l_linenumber": int(ln)}}
-                    ],
-                }
-                for (ok, ln) in rows
-            ),
-        )
-
-    if "DC2" in dcs:
-        rows = fetchall(con, SQL_DC2_MIS)
-        path = os.path.join(out_dir, "mis_DC2.jsonl")
-        counts["DC2"] = jsonl_write(
-            path,
-            (
-                {
-                    "dc": "DC2",
-                    "tuples": [
-                        {"table": "orders", "pk": {"o_orderkey": int(o_ok)}},
-                        {"table": "lineitem", "pk": {"l_orderkey": int(l_ok), "l_linenumber": int(l_ln)}},
-                    ],
-                }
-                for (o_ok, l_ok, l_ln) in rows
-            ),
-        )
-
-    if "DC3" in dcs:
-        rows = fetchall(con, SQL_DC3_MIS)
-        path = os.path.join(out_dir, "mis_DC3.jsonl")
-        counts["DC3"] = jsonl_write(
-            path,
-            (
-                {
-                    "dc": "DC3",
-                    "tuples": [
-                        {"table": "orders", "pk": {"o_orderkey": int(o_ok)}},
-                        {"table": "lineitem", "pk": {"l_orderkey": int(l_ok), "l_linenumber": int(l_ln)}},
-                    ],
-                }
-                for (o_ok, l_ok, l_ln) in rows
-            ),
-        )
-
-    if "DC4" in dcs:
-        rows = fetchall(con, SQL_DC4_MIS)
-        path = os.path.join(out_dir, "mis_DC4.jsonl")
-        counts["DC4"] = jsonl_write(
-            path,
-            (
-                {
-                    "dc": "DC4",
-                    "tuples": [
-                        {"table": "lineitem", "pk": {"l_orderkey": int(l_ok), "l_linenumber": int(l_ln)}},
-                        {"table": "partsupp", "pk": {"ps_partkey": int(ps_pk), "ps_suppkey": int(ps_sk)}},
-                        {"table": "part", "pk": {"p_partkey": int(p_pk)}},
-                    ],
-                }
-                for (l_ok, l_ln, ps_pk, ps_sk, p_pk) in rows
-            ),
-        )
+    for dc in MIS_SQL:
+        if dc in dcs:
+            counts[dc] = copy_mis_jsonl(con, dc, os.path.join(out_dir, f"mis_{dc}.jsonl"))
 
     return counts
 
@@ -381,12 +381,23 @@ SUBSETS = {
 }
 
 
-def run_one(clean_db: str, out_db: str, out_dir: str, dcs: Sequence[str], ratio: float, seed: int) -> dict:
-    """Copy clean DB, inject violations, export MIS, return metadata."""
+def run_one(
+    clean_db: str,
+    out_db: str,
+    out_dir: str,
+    dcs: Sequence[str],
+    ratio: float,
+    seed: int,
+    duckdb_config: Dict[str, str] | None = None,
+) -> dict:
+    """Copy clean DB, inject violations, export MIS, return metadata.
+
+    duckdb_config: settings for the run's connection (threads, memory_limit, ...).
+    """
     ensure_dir(os.path.dirname(out_db))
-    shutil.copyfile(clean_db, out_db)
+    clone_db(clean_db, out_db)
 
-    con = duckdb.connect(out_db)
+    con = duckdb.connect(out_db, config=duckdb_config or {})
 
     base_lineitem = count_rows(con, "lineitem")
     base_partsupp = count_rows(con, "partsupp")
@@ -407,14 +418,22 @@ def run_one(clean_db: str, out_db: str, out_dir: str, dcs: Sequence[str], ratio:
 
     inject_log: List[InjectResult] = []
 
-    if "DC1" in dcs:
-        inject_log.append(inject_dc1(con, n_lineitem, dc_seed["DC1"]))
-    if "DC2" in dcs:
-        inject_log.append(inject_dc2(con, n_lineitem, dc_seed["DC2"]))
-    if "DC3" in dcs:
-        inject_log.append(inject_dc3(con, n_lineitem, dc_seed["DC3"]))
-    if "DC4" in dcs:
-        inject_log.append(inject_DC4(con, n_partsupp, dc_seed["DC4"]))
+    # All injections of a run commit together; on failure nothing is applied.
+    con.execute("BEGIN TRANSACTION")
+    try:
+        if "DC1" in dcs:
+            inject_log.append(inject_dc1(con, n_lineitem, dc_seed["DC1"]))
+        if "DC2" in dcs:
+            inject_log.append(inject_dc2(con, n_lineitem, dc_seed["DC2"]))
+        if "DC3" in dcs:
+            inject_log.append(inject_dc3(con, n_lineitem, dc_seed["DC3"]))
+        if "DC4" in dcs:
+            inject_log.append(inject_DC4(con, n_partsupp, dc_seed["DC4"]))
+        con.execute("COMMIT")
+    except Exception:
+        con.execute("ROLLBACK")
+        con.close()
+        raise
 
     # Export all MIS after injection (ground truth).
     mis_dir = os.path.join(out_dir, "mis")
@@ -423,7 +442,7 @@ def run_one(clean_db: str, out_db: str, out_dir: str, dcs: Sequence[str], ratio:
     con.close()
 
     meta = {
-        "timestamp": datetime.utcnow().isoformat() + "Z",
+        "timestamp": datetime.now(timezone.utc).strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
         "clean_db": clean_db,
         "out_db": out_db,
         "subset": list(dcs),
@@ -442,8 +461,8 @@ def run_one(clean_db: str, out_db: str, out_dir: str, dcs: Sequence[str], ratio:
     }
 
     ensure_dir(out_dir)
-    with open(os.path.join(out_dir, "meta.json"), "w", encoding="utf-8") as f:
-        json.dump(meta, f, ensure_ascii=False, indent=2)
+    with open(os.path.join(out_dir, "meta.json"), "wb") as f:
+        f.write(orjson.dumps(meta, option=orjson.OPT_INDENT_2))
 
     return meta
 
@@ -467,6 +486,22 @@ def parse_args() -> argparse.Namespace:
         choices=list(SUBSETS.keys()),
         help="Which DC subsets to generate.",
     )
+    p.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Runs (subset, ratio, seed) executed in parallel.",
+    )
+    p.add_argument(
+        "--memory_limit",
+        default=None,
+        help="DuckDB memory_limit per run, e.g. 4GB (default: 80%% of RAM split between the workers).",
+    )
+    p.add_argument(
+        "--temp_directory",
+        default=None,
+        help="DuckDB spill directory per run, e.g. /dev/shm/duckdb_tmp.",
+    )
     return p.parse_args()
 
 
@@ -492,8 +527,9 @@ def main() -> None:
 
     ensure_dir(out_root)
 
-    all_meta = []
-
+    # Runs are independent (own DB copy + connection each): build the task list
+    # of (subset, ratio, seed) and run them in a process pool.
+    tasks = []
     for subset_name in args.subsets:
         dcs = SUBSETS[subset_name]
 
@@ -505,25 +541,55 @@ def main() -> None:
                 ensure_dir(run_dir)
 
                 out_db = os.path.join(run_dir, f"tpch_{subset_name}_{rtag}_seed{seed:02d}.duckdb")
+                tasks.append((subset_name, rtag, r, seed, run_dir, out_db, dcs))
+
+    all_meta = []
 
-                meta = run_one(
-                    clean_db=clean_db,
-                    out_db=out_db,
-                    out_dir=run_dir,
-                    dcs=dcs,
-                    ratio=r,
-                    seed=seed,
-                )
+    n_workers = max(1, min(len(tasks), args.workers))
 
-                print(
-                    f"[OK] {subset_name} {rtag} seed={seed:02d}: "
-                    + ", ".join([f"{k}={v}" for k, v in meta["mis_counts"].items()])
-                )
+    # Per-run DuckDB settings: split the cores and the memory (DuckDB's own
+    # default is 80% of RAM per process, which N parallel runs would exceed)
+    # between the parallel runs, keep the injection transaction from
+    # checkpointing midway, optional spill directory.
+    duckdb_config = {
+        "threads": str(max(1, (os.cpu_count() or 1) // n_workers)),
+        "checkpoint_threshold": "1GB",
+    }
+    if args.memory_limit:
+        duckdb_config["memory_limit"] = args.memory_limit
+    else:
+        total = total_memory_bytes()
+        if total:
+            duckdb_config["memory_limit"] = f"{max(1, int(total * 0.8) // n_workers >> 20)}MiB"
+    if args.temp_directory:
+        duckdb_config["temp_directory"] = args.temp_directory
+
+    with ProcessPoolExecutor(max_workers=n_workers) as ex:
+        futures = [
+            ex.submit(
+                run_one,
+                clean_db=clean_db,
+                out_db=out_db,
+                out_dir=run_dir,
+                dcs=dcs,
+                ratio=r,
+                seed=seed,
+                duckdb_config=duckdb_config,
+            )
+            for (_, _, r, seed, run_dir, out_db, dcs) in tasks
+        ]
+        for (subset_name, rtag, r, seed, run_dir, _, _), fut in zip(tasks, futures):
+            meta = fut.result()
+
+            print(
+                f"[OK] {subset_name} {rtag} seed={seed:02d}: "
+                + ", ".join([f"{k}={v}" for k, v in meta["mis_counts"].items()])
+            )
 
-                all_meta.append({"subset": subset_name, "ratio": r, "seed": seed, "run_dir": run_dir})
+            all_meta.append({"subset": subset_name, "ratio": r, "seed": seed, "run_dir": run_dir})
 
-    with open(os.path.join(out_root, "index.json"), "w", encoding="utf-8") as f:
-        json.dump(all_meta, f, ensure_ascii=False, indent=2)
+    with open(os.path.join(out_root, "index.json"), "wb") as f:
+        f.write(orjson.dumps(all_meta, option=orjson.OPT_INDENT_2))
 
 
 if __name__ == "__main__":
@@ -1,4 +1,4 @@
-from .cim import compute_cim
-from .pim import compute_pim
-from .cbm import compute_cbm
-from .rim import compute_rim
+from .cim import compute_cim, compute_cim_from
+from .pim import compute_pim, compute_pim_from
+from .cbm import compute_cbm, compute_cbm_from
+from .rim import compute_rim, compute_rim_from
@@ -1,27 +1,24 @@
 from __future__ import annotations
 
-from collections import defaultdict
 from pathlib import Path
-from typing import Dict, List, Tuple
+from typing import Dict, List
 
-from .common import TupleKey, iter_mis_tuples, load_mis_file
+from .common import MIS, TupleKey, iter_mis_tuples, load_all, scatter_scores
 
 
 def compute_cbm(mis_dir: Path, dcs: List[str]) -> Dict[TupleKey, float]:
+    return compute_cbm_from(load_all(mis_dir, dcs))
+
+
+def compute_cbm_from(mis_by_dc: Dict[str, List[MIS]]) -> Dict[TupleKey, float]:
     """
     CBM (constraint-based):
     For each DC, every tuple that appears in at least one MIS of this DC gets +1.
     Multiple MIS of the same DC do NOT accumulate extra score.
     """
-    score: Dict[TupleKey, float] = defaultdict(float)
-
-    for dc in dcs:
-        path = mis_dir / f"{dc}.json"
-        if not path.exists():
-            continue
-
-        mis_list = load_mis_file(path)
+    keys: List[TupleKey] = []
 
+    for dc, mis_list in mis_by_dc.items():
         # for all the tuples appeared for each DC, +1
         tuples_for_dc = set()  # type: set[TupleKey]
 
@@ -30,7 +27,6 @@ def compute_cbm(mis_dir: Path, dcs: List[str]) -> Dict[TupleKey, float]:
                 tuples_for_dc.add(tk)
 
         # Each DC contribute no more than once to each tuple
-        for tk in tuples_for_dc:
-            score[tk] += 1.0
+        keys.extend(tuples_for_dc)
 
-    return dict(score)
+    return scatter_scores(keys)
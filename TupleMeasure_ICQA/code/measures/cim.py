@@ -1,10 +1,9 @@
 from __future__ import annotations
 
-from collections import defaultdict
 from pathlib import Path
 from typing import Dict, List
 
-from .common import TupleKey, iter_mis_tuples, load_mis_file
+from .common import MIS, TupleKey, iter_mis_tuples, load_all, scatter_scores
 
 
 # CIM relation-specific weights by DC
@@ -17,23 +16,25 @@ CIM_WEIGHTS = {
 
 
 def compute_cim(mis_dir: Path, dcs: List[str]) -> Dict[TupleKey, float]:
+    return compute_cim_from(load_all(mis_dir, dcs))
+
+
+def compute_cim_from(mis_by_dc: Dict[str, List[MIS]]) -> Dict[TupleKey, float]:
     """
     CIM: each tuple in MIS gets +w(DC, relation).
     """
-    score: Dict[TupleKey, float] = defaultdict(float)
+    keys: List[TupleKey] = []
+    weights: List[float] = []
 
-    for dc in dcs:
+    for dc, mis_list in mis_by_dc.items():
         rel_w = CIM_WEIGHTS.get(dc, {})
         if not rel_w:
             continue
-        path = mis_dir / f"{dc}.json"
-        if not path.exists():
-            continue
-        mis_list = load_mis_file(path)
         for mis in mis_list:
             for rel, pk in iter_mis_tuples(mis):
                 w = rel_w.get(rel, 0.0)
                 if w:
-                    score[(rel, pk)] += w
+                    keys.append((rel, pk))
+                    weights.append(w)
 
-    return dict(score)
+    return scatter_scores(keys, weights)
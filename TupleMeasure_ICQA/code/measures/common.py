@@ -1,14 +1,21 @@
 from __future__ import annotations
 
-import json
 import time
 from dataclasses import dataclass
+from itertools import chain
 from pathlib import Path
 from typing import Any, Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
 
+import numpy as np
+import orjson
+import pyarrow.parquet as pq
+
 TupleKey = Tuple[str, Tuple[int, ...]]  # (relation, pk_tuple)
 MIS = Dict[str, Any]
 
+# MIS field holding the TupleKeys of the MIS, filled in by load_all
+MIS_KEYS = "_keys"
+
 
 def normalize_pk(pk: Any) -> Tuple[int, ...]:
     """
@@ -33,6 +40,28 @@ def normalize_pk(pk: Any) -> Tuple[int, ...]:
     return (int(pk),)
 
 
+def normalize_pks_bulk(pks: List[Any]) -> List[Tuple[int, ...]]:
+    """
+    Normalize all pks of one relation at once. The pks of a relation share
+    one shape (ints for part/orders, [..] keys for lineitem/partsupp), so the
+    whole column is type-checked at once (ints, or non-empty [..] keys of
+    ints) and converted without per-pk dispatch; any other column (strings,
+    mixed shapes) goes through normalize_pk item by item.
+    """
+    if not pks:
+        return []
+    types = set(map(type, pks))
+    if types <= {int}:
+        return [(pk,) for pk in pks]
+    if (
+        types <= {list, tuple}
+        and min(map(len, pks)) > 0
+        and set(map(type, chain.from_iterable(pks))) <= {int}
+    ):
+        return list(map(tuple, pks))
+    return [normalize_pk(pk) for pk in pks]
+
+
 def iter_mis_tuples(mis: MIS) -> Iterable[TupleKey]:
     """
     Yield normalized TupleKey from one MIS dict:
@@ -40,7 +69,14 @@ def iter_mis_tuples(mis: MIS) -> Iterable[TupleKey]:
     Note:
       - For relations where pks are lists of lists (lineitem/partsupp), we iterate inner lists.
       - For relations where pks are lists of ints (part/orders), iterate ints.
+      - MIS loaded by load_all carry their (interned) keys already; those are
+        yielded as is.
     """
+    keys = mis.get(MIS_KEYS)
+    if keys is not None:
+        yield from keys
+        return
+
     tuples_obj = mis.get("tuples", {})
     if not isinstance(tuples_obj, dict):
         return
@@ -49,21 +85,48 @@ def iter_mis_tuples(mis: MIS) -> Iterable[TupleKey]:
         if pks is None:
             continue
 
-        # lineitem / partsupp are often list of [..] keys
         if isinstance(pks, list):
-            for item in pks:
-                # item can be int OR list/tuple of ints
-                if isinstance(item, (list, tuple)):
-                    yield (rel, normalize_pk(item))
-                else:
-                    yield (rel, normalize_pk(item))
+            for pk in normalize_pks_bulk(pks):
+                yield (rel, pk)
         else:
             # uncommon, but handle
             yield (rel, normalize_pk(pks))
 
 
+def mis_file_path(mis_dir: Path, dc: str) -> Path:
+    """
+    MIS file of one DC: DC*.parquet as written by extract_mis, falling back
+    to DC*.json (--format json / older extractions).
+    """
+    path = mis_dir / f"{dc}.parquet"
+    if path.exists():
+        return path
+    return mis_dir / f"{dc}.json"
+
+
+def load_mis_parquet(path: Path) -> List[MIS]:
+    """
+    Rebuild the MIS dict list from the flat Parquet layout
+    (dc, mis_id, relation, pk); single-column keys come back as ints,
+    composite keys as lists, as in the JSON files.
+    """
+    cols = pq.read_table(path, columns=["dc", "mis_id", "relation", "pk"]).to_pydict()
+    mis_list: List[MIS] = []
+    by_id: Dict[int, MIS] = {}
+    for dc, mis_id, rel, pk in zip(cols["dc"], cols["mis_id"], cols["relation"], cols["pk"]):
+        mis = by_id.get(mis_id)
+        if mis is None:
+            mis = {"dc": dc, "tuples": {}}
+            by_id[mis_id] = mis
+            mis_list.append(mis)
+        mis["tuples"].setdefault(rel, []).append(pk[0] if len(pk) == 1 else pk)
+    return mis_list
+
+
 def load_mis_file(path: Path) -> List[MIS]:
-    data = json.loads(path.read_text())
+    if path.suffix == ".parquet":
+        return load_mis_parquet(path)
+    data = orjson.loads(path.read_bytes())
     if isinstance(data, list):
         return data
     if isinstance(data, dict) and "mis" in data:
@@ -71,6 +134,106 @@ def load_mis_file(path: Path) -> List[MIS]:
     raise ValueError(f"Unexpected MIS JSON structure at {path}")
 
 
+# Bits reserved for the second pk column when packing a composite pk into
+# one int64 (l_linenumber <= 7, ps_suppkey < 2^32); the first column gets
+# the remaining 63 - bits.
+PK_PACK_BITS = {"lineitem": 6, "partsupp": 32}
+
+
+def can_pack_pks(rel: str, pks: np.ndarray) -> bool:
+    """
+    True if pack_pks can pack this (k, width) int64 pk array losslessly:
+    single-column keys always, two-column keys of a PK_PACK_BITS relation
+    whose columns are non-negative and fit their bit widths.
+    """
+    if pks.shape[1] == 1:
+        return True
+    bits = PK_PACK_BITS.get(rel)
+    if bits is None or pks.shape[1] != 2:
+        return False
+    if len(pks) == 0:
+        return True
+    return bool(
+        pks.min() >= 0
+        and pks[:, 0].max() < (1 << (63 - bits))
+        and pks[:, 1].max() < (1 << bits)
+    )
+
+
+def pack_pks(rel: str, pks: np.ndarray) -> np.ndarray:
+    """Pack a (k, 1|2) int64 pk array of one relation into k int64 keys."""
+    if pks.shape[1] == 1:
+        return pks[:, 0]
+    if not can_pack_pks(rel, pks):
+        raise ValueError(f"pks of {rel!r} do not fit the packed int64 layout")
+    return (pks[:, 0] << PK_PACK_BITS[rel]) | pks[:, 1]
+
+
+def unpack_pks(rel: str, packed: np.ndarray, width: int) -> List[Tuple[int, ...]]:
+    if width == 1:
+        return [(pk,) for pk in packed.tolist()]
+    bits = PK_PACK_BITS[rel]
+    return list(zip((packed >> bits).tolist(), (packed & ((1 << bits) - 1)).tolist()))
+
+
+def scatter_scores(keys: List[TupleKey], weights: Optional[List[float]] = None) -> Dict[TupleKey, float]:
+    """
+    Sum weights per TupleKey. Keys are split per relation and their pks
+    packed into int64 (pack_pks), then densified with np.unique and summed
+    with one np.bincount per relation instead of a dict update per key.
+    Relations whose pks cannot be packed (can_pack_pks) are densified on
+    the pk rows themselves.
+    weights=None counts each key once per occurrence. Result in first-seen
+    key order.
+    """
+    pos_by_rel: Dict[str, List[int]] = {}
+    pks_by_rel: Dict[str, List[Tuple[int, ...]]] = {}
+    for i, (rel, pk) in enumerate(keys):
+        if rel not in pos_by_rel:
+            pos_by_rel[rel] = []
+            pks_by_rel[rel] = []
+        pos_by_rel[rel].append(i)
+        pks_by_rel[rel].append(pk)
+
+    w_all = np.ones(len(keys)) if weights is None else np.asarray(weights, dtype=np.float64)
+    parts = []
+    for rel, pos in pos_by_rel.items():
+        pos_arr = np.asarray(pos, dtype=np.int64)
+        pks = np.asarray(pks_by_rel[rel], dtype=np.int64)
+        if can_pack_pks(rel, pks):
+            uniq, first, inv = np.unique(pack_pks(rel, pks), return_index=True, return_inverse=True)
+            uniq_pks = unpack_pks(rel, uniq, pks.shape[1])
+        else:
+            uniq, first, inv = np.unique(pks, axis=0, return_index=True, return_inverse=True)
+            uniq_pks = list(map(tuple, uniq.tolist()))
+        sums = np.bincount(inv.reshape(-1), weights=w_all[pos_arr], minlength=len(uniq))
+        for p, tk, v in zip(pos_arr[first].tolist(), uniq_pks, sums.tolist()):
+            parts.append((p, rel, tk, v))
+
+    parts.sort()
+    return {(rel, tk): v for _, rel, tk, v in parts}
+
+
+def load_all(mis_dir: Path, dcs: Sequence[str]) -> Dict[str, List[MIS]]:
+    """
+    Parse the MIS file of every DC once: {dc: mis_list} in `dcs` order,
+    DCs without a MIS file are left out. Shared by all measures of one DB.
+    The TupleKeys of every MIS are normalized once here and interned across
+    DCs (one key object per tuple of the DB), so the measures neither
+    rebuild them nor compare equal keys element-wise.
+    """
+    pool: Dict[TupleKey, TupleKey] = {}
+    mis_by_dc: Dict[str, List[MIS]] = {}
+    for dc in dcs:
+        path = mis_file_path(mis_dir, dc)
+        if path.exists():
+            mis_list = load_mis_file(path)
+            for mis in mis_list:
+                mis[MIS_KEYS] = [pool.setdefault(tk, tk) for tk in iter_mis_tuples(mis)]
+            mis_by_dc[dc] = mis_list
+    return mis_by_dc
+
+
 @dataclass(frozen=True)
 class DBInstance:
     scale: str
@@ -87,7 +250,7 @@ class DBInstance:
 def discover_db_instances(violations_root: Path, scales: Optional[Sequence[str]] = None) -> List[DBInstance]:
     """
     Scan violations directory, expecting:
-      violations/sf1/subsetB/0p1pct/seed10/mis/DC*.json
+      violations/sf1/subsetB/0p1pct/seed10/mis/DC*.parquet (or DC*.json)
     """
     instances: List[DBInstance] = []
     if scales is None:
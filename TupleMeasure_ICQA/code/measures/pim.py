@@ -1,10 +1,9 @@
 from __future__ import annotations
 
-from collections import defaultdict
 from pathlib import Path
 from typing import Dict, List
 
-from .common import TupleKey, iter_mis_tuples, load_mis_file
+from .common import MIS, TupleKey, iter_mis_tuples, load_all, scatter_scores
 
 
 PIM_WEIGHTS = {
@@ -16,21 +15,23 @@ PIM_WEIGHTS = {
 
 
 def compute_pim(mis_dir: Path, dcs: List[str]) -> Dict[TupleKey, float]:
+    return compute_pim_from(load_all(mis_dir, dcs))
+
+
+def compute_pim_from(mis_by_dc: Dict[str, List[MIS]]) -> Dict[TupleKey, float]:
     """
     PIM: each tuple in MIS gets +w(DC), no relation-specific weights.
     """
-    score: Dict[TupleKey, float] = defaultdict(float)
+    keys: List[TupleKey] = []
+    weights: List[float] = []
 
-    for dc in dcs:
+    for dc, mis_list in mis_by_dc.items():
         w = PIM_WEIGHTS.get(dc, 0.0)
         if w == 0.0:
             continue
-        path = mis_dir / f"{dc}.json"
-        if not path.exists():
-            continue
-        mis_list = load_mis_file(path)
+        n_before = len(keys)
         for mis in mis_list:
-            for tk in iter_mis_tuples(mis):
-                score[tk] += w
+            keys.extend(iter_mis_tuples(mis))
+        weights.extend([w] * (len(keys) - n_before))
 
-    return dict(score)
+    return scatter_scores(keys, weights)
@@ -1,13 +1,55 @@
 from __future__ import annotations
 
-from collections import defaultdict
+import hashlib
+import os
+import pickle
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
 from dataclasses import dataclass
 from pathlib import Path
-from typing import Dict, List, Set, Tuple, Optional, Iterable
+from typing import Dict, List, Tuple, Optional, Iterable
 
+import numba as nb
+import numpy as np
 from ortools.sat.python import cp_model
 
-from .common import TupleKey, iter_mis_tuples, load_mis_file
+from .common import MIS, TupleKey, iter_mis_tuples, load_all, mis_file_path, scatter_scores
+
+
+# Below this many edges CP-SAT's presolve probing costs more than the
+# search itself, so it is switched off.
+PROBING_MIN_EDGES = 50
+
+_TL = threading.local()
+
+# Default location of the opt-in disk cache of per-DC RIM results, keyed
+# by the MIS file contents and the solver settings (see _cache_path)
+RIM_CACHE_DIR = Path.home() / ".cache" / "tuplemeasure" / "rim"
+
+# Hash of this module's source: cached results of older code are not reused
+_CODE_TAG = hashlib.blake2b(Path(__file__).read_bytes(), digest_size=8).digest()
+
+
+def _solver(time_limit_s: float, num_workers: int, probing: bool = True) -> cp_model.CpSolver:
+    """
+    CpSolver of the calling thread for these parameters, created (and its
+    parameters written) once and reused by every later solve; search
+    logging is off.
+    """
+    cache = getattr(_TL, "solvers", None)
+    if cache is None:
+        cache = _TL.solvers = {}
+    key = (float(time_limit_s), max(1, int(num_workers)), bool(probing))
+    solver = cache.get(key)
+    if solver is None:
+        solver = cache[key] = cp_model.CpSolver()
+        solver.parameters.max_time_in_seconds = key[0]
+        solver.parameters.num_search_workers = key[1]
+        solver.parameters.log_search_progress = False
+        if not probing:
+            solver.parameters.cp_model_probing_level = 0
+    return solver
 
 
 @dataclass
@@ -19,99 +61,216 @@ class GammaResult:
     n_nodes: int
 
 
-def greedy_hitting_set_size(edges: List[Set[int]]) -> int:
-    """
-    Greedy set cover / hitting set heuristic to produce an upper bound.
-    """
-    uncovered = [set(e) for e in edges if e]
-    if not uncovered:
-        return 0
-    # frequency
-    size = 0
-    while uncovered:
-        freq = defaultdict(int)
-        for e in uncovered:
-            for u in e:
-                freq[u] += 1
-        # pick max frequency
-        best_u, best_f = None, -1
-        for u, f in freq.items():
-            if f > best_f:
-                best_u, best_f = u, f
-        if best_u is None:
-            break
-        size += 1
-        # remove edges hit by best_u
-        uncovered = [e for e in uncovered if best_u not in e]
-    return size
-
-
-def solve_min_hitting_set_size_cpsat(
-    edges: List[Set[int]],
-    time_limit_s: float = 1.0,
-    upper_bound: Optional[int] = None,
-) -> Tuple[int, str]:
+class EdgeHittingSetModel:
     """
-    Solve min hitting set size:
-      min sum x_i
-      s.t. for each edge e: sum_{i in e} x_i >= 1
+    One CP-SAT model per DC over all edges; every edge e is behind an
+    activation literal a_e (a_e => OR_{i in e} x_i). Gamma(t) is solved on
+    the same model and solver, switching the edges that contain t off by
+    fixing a_e in the model proto, instead of rebuilding the model per tuple.
+    (Fixed domains, unlike assumptions, are simplified away by presolve.)
+    The solver is the thread's cached one for these parameters (_solver).
+
+    The model is written straight into the CpModelProto (variables x_0..x_{n-1},
+    a_0..a_{m-1}, obj), and each solve only rewrites domains and the hint
+    values in place, so no Python expression objects are built per tuple.
     """
-    if not edges:
-        return 0, "TRIVIAL"
-
-    model = cp_model.CpModel()
-    nodes: Set[int] = set()
-    for e in edges:
-        nodes |= e
-    nodes_list = sorted(nodes)
-
-    x = {i: model.NewBoolVar(f"x_{i}") for i in nodes_list}
 
-    for e in edges:
-        # guard: empty edge would be infeasible; ignore because it should not happen
-        if e:
-            model.Add(sum(x[i] for i in e) >= 1)
-
-    obj = sum(x[i] for i in nodes_list)
-    model.Minimize(obj)
-
-    if upper_bound is not None:
-        # optional pruning: objective <= upper_bound
-        model.Add(obj <= upper_bound)
-
-    solver = cp_model.CpSolver()
-    solver.parameters.max_time_in_seconds = float(time_limit_s)
-    solver.parameters.num_search_workers = 8  # adjust if needed
+    def __init__(
+        self,
+        edges: List[frozenset],
+        n_nodes: int,
+        time_limit_s: float = 1.0,
+        num_workers: int = 8,
+    ):
+        self.n_nodes = n_nodes
+        self.model = cp_model.CpModel()
+        proto = self.model.Proto()
+        for _ in range(n_nodes + len(edges)):
+            proto.variables.add().domain.extend([0, 1])
+        obj = n_nodes + len(edges)
+        proto.variables.add().domain.extend([0, n_nodes])
+
+        # a_e => OR_{i in e} x_i, as a clause for the SAT engine
+        for j, e in enumerate(edges):
+            ct = proto.constraints.add()
+            ct.enforcement_literal.append(n_nodes + j)
+            ct.bool_or.literals.extend(list(e))
+
+        # obj == sum_i x_i, so each solve can bound its domain to [lb, ub]
+        lin = proto.constraints.add().linear
+        lin.vars.extend(range(n_nodes))
+        lin.vars.append(obj)
+        lin.coeffs.extend([1] * n_nodes)
+        lin.coeffs.append(-1)
+        lin.domain.extend([0, 0])
+        proto.objective.vars.append(obj)
+        proto.objective.coeffs.append(1)
+
+        self.active_domains = [proto.variables[n_nodes + j].domain for j in range(len(edges))]
+        self.obj_domain = proto.variables[obj].domain
+        proto.solution_hint.vars.extend(range(n_nodes))
+        proto.solution_hint.vars.append(obj)
+        self.hint_values = proto.solution_hint.values
+
+        self.solver = _solver(time_limit_s, num_workers, probing=len(edges) >= PROBING_MIN_EDGES)
+
+    def solve(
+        self,
+        keep: np.ndarray,
+        hint: Iterable[int],
+        lower_bound: int = 0,
+        upper_bound: Optional[int] = None,
+    ) -> Tuple[int, str]:
+        """
+        Min hitting set size of the edges with keep[j] True, warm-started
+        from `hint`, with the objective restricted to [lower_bound, upper_bound].
+        Returns (-1, "TIMEOUT") if no solution was found.
+        """
+        for dom, k in zip(self.active_domains, keep.tolist()):
+            dom[0] = dom[1] = int(k)
+        self.obj_domain[0] = int(lower_bound)
+        self.obj_domain[1] = self.n_nodes if upper_bound is None else int(upper_bound)
+        hit = np.zeros(self.n_nodes + 1, dtype=np.int64)
+        hint = list(hint)
+        hit[hint] = 1
+        hit[-1] = len(hint)
+        self.hint_values.clear()
+        self.hint_values.extend(hit.tolist())
+
+        status = self.solver.Solve(self.model)
+        if status == cp_model.OPTIMAL:
+            return int(self.solver.ObjectiveValue()), "OPTIMAL"
+        if status == cp_model.FEASIBLE:
+            return int(self.solver.ObjectiveValue()), "FEASIBLE"
+        return -1, "TIMEOUT"
+
+
+@nb.njit(cache=True)
+def _popcount(x):
+    n = 0
+    while x:
+        x &= x - np.uint64(1)
+        n += 1
+    return n
+
+
+@nb.njit(cache=True)
+def _greedy_bits(bits, active):
+    """
+    Greedy over the active rows of a uint64 edge-bitset matrix: count each
+    vertex over the active edges (walking the set bits of every word), take
+    the most frequent one (lowest id on ties), drop the edges it hits.
+    Returns the picked vertices in order.
+    """
+    n_edges, n_words = bits.shape
+    active = active.copy()
+    n_active = 0
+    for j in range(n_edges):
+        if active[j]:
+            n_active += 1
+    freq = np.zeros(n_words * 64, dtype=np.int64)
+    picked = np.empty(n_active, dtype=np.int64)
+    n_picked = 0
+    one = np.uint64(1)
+    while n_active > 0:
+        freq[:] = 0
+        for j in range(n_edges):
+            if not active[j]:
+                continue
+            for w in range(n_words):
+                x = bits[j, w]
+                while x:
+                    low = x & (~x + one)
+                    freq[w * 64 + _popcount(low - one)] += 1
+                    x ^= low
+        best = 0
+        for v in range(freq.shape[0]):
+            if freq[v] > freq[best]:
+                best = v
+        picked[n_picked] = best
+        n_picked += 1
+        w = best >> 6
+        bit = one << np.uint64(best & 63)
+        for j in range(n_edges):
+            if active[j] and bits[j, w] & bit:
+                active[j] = False
+                n_active -= 1
+    return picked[:n_picked]
+
+
+def greedy_hitting_set_bits(bits: np.ndarray, active: np.ndarray) -> List[int]:
+    """
+    Greedy hitting set (most frequent vertex first) on a uint64 edge-bitset
+    matrix (one row per edge, bit v of the row set iff v is in the edge),
+    restricted to the rows with active True; used as the upper bound and as
+    the CP-SAT solution hint. Compiled with numba (_greedy_bits).
+    """
+    return _greedy_bits(bits, active).tolist()
 
-    status = solver.Solve(model)
 
-    if status == cp_model.OPTIMAL:
-        return int(solver.ObjectiveValue()), "OPTIMAL"
-    if status == cp_model.FEASIBLE:
-        return int(solver.ObjectiveValue()), "FEASIBLE"
-    # UNKNOWN typically means timeout
-    return (upper_bound if upper_bound is not None else int(solver.ObjectiveValue()) if status == cp_model.FEASIBLE else -1), "TIMEOUT"
+@nb.njit(cache=True)
+def _matching_bits(bits, active, order):
+    """
+    Greedy matching over the active rows of a uint64 edge-bitset matrix,
+    visited in `order`: take a row if it shares no bit with the rows taken
+    so far. Returns the number of rows taken.
+    """
+    n_words = bits.shape[1]
+    used = np.zeros(n_words, dtype=np.uint64)
+    n = 0
+    for j in order:
+        if not active[j]:
+            continue
+        free = True
+        for w in range(n_words):
+            if bits[j, w] & used[w]:
+                free = False
+                break
+        if free:
+            for w in range(n_words):
+                used[w] |= bits[j, w]
+            n += 1
+    return n
+
+
+def matching_lower_bound_bits(
+    bits: np.ndarray, active: np.ndarray, order: Optional[np.ndarray] = None
+) -> int:
+    """
+    Size of a greedy maximal set of pairwise disjoint active edges: each of
+    them needs its own vertex, so this is a lower bound on the hitting set.
+    order: edge visiting order (smallest edges first gives larger matchings).
+    Compiled with numba (_matching_bits).
+    """
+    if order is None:
+        order = np.arange(bits.shape[0])
+    return int(_matching_bits(bits, active, order))
 
 
-def build_hypergraph_from_mis(mis_list: List[dict]) -> Tuple[List[Set[TupleKey]], Set[TupleKey]]:
+def build_hypergraph_from_mis(mis_list: List[dict]) -> Tuple[List[frozenset], List[TupleKey]]:
     """
-    Build hyperedges (as sets of TupleKey) from MIS list, and the universe of tuples.
+    Build hyperedges (as frozensets of int node ids) from MIS list in one
+    pass, and the universe of tuples (node id -> TupleKey, first-seen order).
     """
-    edges: List[Set[TupleKey]] = []
-    universe: Set[TupleKey] = set()
+    node_id: Dict[TupleKey, int] = {}
+    edges: List[frozenset] = []
     for mis in mis_list:
-        e = set(iter_mis_tuples(mis))
-        if not e:
-            continue
-        edges.append(e)
-        universe |= e
-    return edges, universe
+        e = set()
+        for tk in iter_mis_tuples(mis):
+            i = node_id.get(tk)
+            if i is None:
+                i = node_id[tk] = len(node_id)
+            e.add(i)
+        if e:
+            edges.append(frozenset(e))
+    return edges, list(node_id)
 
 
 def compute_rim_for_dc(
     mis_list: List[dict],
     time_limit_s: float = 1.0,
     enable_cache: bool = True,
+    num_workers: int = 8,
 ) -> Tuple[Dict[TupleKey, float], Dict[TupleKey, GammaResult]]:
     """
     For one DC:
@@ -121,6 +280,7 @@ def compute_rim_for_dc(
            rho(t)=1/(1+Gamma)
       - normalize rho' within this DC
       - contribution to RIM: rho'(t)*m
+    num_workers: CP-SAT search workers of the per-DC solver.
     Returns:
       rim_contrib: per tuple contribution for this DC
       gamma_details: per tuple GammaResult for logging
@@ -129,66 +289,116 @@ def compute_rim_for_dc(
     if m == 0:
         return {}, {}
 
-    edges_tk, universe = build_hypergraph_from_mis(mis_list)
-
-    # map TupleKey -> int id for solver input (per t we will filter edges and rebuild ids)
-    # We keep per-DC stable id mapping to speed caching/edge signature.
-    all_nodes = sorted(universe)
-    node_id = {tk: i for i, tk in enumerate(all_nodes)}
-    edges_ids: List[Set[int]] = [set(node_id[tk] for tk in e) for e in edges_tk]
-
-    # cache by filtered edge-signature (optional)
-    cache: Dict[Tuple[int, ...], Tuple[int, str]] = {}
+    # per-DC int ids (all_nodes[i] is the TupleKey of node i) for the solver,
+    # the bitsets and the caches
+    edges_ids, all_nodes = build_hypergraph_from_mis(mis_list)
+
+    # node -> edge incidence in CSR form: inc_edges[inc_ptr[t]:inc_ptr[t+1]]
+    # are the (ascending) ids of the edges that contain t
+    sizes = np.fromiter((len(e) for e in edges_ids), dtype=np.int64, count=len(edges_ids))
+    inc_nodes = np.fromiter((v for e in edges_ids for v in e), dtype=np.int64, count=int(sizes.sum()))
+    inc_order = np.argsort(inc_nodes, kind="stable")
+    inc_edges = np.repeat(np.arange(len(edges_ids)), sizes)[inc_order]
+    degree = np.bincount(inc_nodes, minlength=len(all_nodes))
+    inc_ptr = np.concatenate(([0], np.cumsum(degree)))
+
+    hs_model = EdgeHittingSetModel(
+        edges_ids, len(all_nodes), time_limit_s=time_limit_s, num_workers=num_workers
+    )
+
+    # edge bitsets: one row of ceil(|U|/64) uint64 words per edge, so the
+    # filtered edge family of t has a canonical form (its rows, sorted) and
+    # the greedy runs bit-parallel on it.
+    bits = np.zeros((len(edges_ids), (len(all_nodes) + 63) // 64), dtype=np.uint64)
+    for i, e in enumerate(edges_ids):
+        v = np.fromiter(e, dtype=np.uint64, count=len(e))
+        np.bitwise_or.at(bits[i], (v >> np.uint64(6)).astype(np.intp), np.uint64(1) << (v & np.uint64(63)))
+    by_size = np.argsort(sizes, kind="stable")
+
+    # Gamma(t) only depends on the edges that contain t, so tuples with the
+    # same incidence row form one class and share one solve.
+    class_ids: Dict[bytes, int] = {}
+    inc_class = [
+        class_ids.setdefault(inc_edges[inc_ptr[t]:inc_ptr[t + 1]].tobytes(), len(class_ids))
+        for t in range(len(all_nodes))
+    ]
+    class_cache: Dict[int, Tuple[int, str]] = {}
+
+    # cache by filtered edge-signature (optional); also catches classes whose
+    # kept edges coincide up to duplicate MIS
+    cache: Dict[bytes, Tuple[int, str]] = {}
+
+    # number of edges that do NOT contain each tuple
+    n_kept_by_node = (len(edges_ids) - degree).tolist()
 
     gamma_details: Dict[TupleKey, GammaResult] = {}
     rho: Dict[TupleKey, float] = {}
 
-    for t in universe:
-        t_id = node_id[t]
+    for t_id, t in enumerate(all_nodes):
+        n_kept = n_kept_by_node[t_id]
+        if n_kept == 0:
+            # t is in every edge: nothing left to hit
+            gamma_details[t] = GammaResult(
+                gamma=0,
+                status="TRIVIAL",
+                runtime_ms=0,
+                n_edges=0,
+                n_nodes=len(all_nodes),
+            )
+            rho[t] = 1.0
+            continue
+
         # filter edges that do NOT contain t
-        filtered = [e for e in edges_ids if t_id not in e]
-        # edge signature for caching: sorted tuple of hashes (each edge sorted tuple)
-        sig: Optional[Tuple[int, ...]] = None
+        keep = np.ones(len(edges_ids), dtype=bool)
+        keep[inc_edges[inc_ptr[t_id]:inc_ptr[t_id + 1]]] = False
+        sig: Optional[bytes] = None
         if enable_cache:
-            # compress signature: use frozenset hashes (order independent)
-            edge_hashes = []
-            for e in filtered:
-                # stable hash via tuple
-                edge_hashes.append(hash(tuple(sorted(e))))
-            sig = tuple(sorted(edge_hashes))
-            if sig in cache:
-                g, st = cache[sig]
+            cached = class_cache.get(inc_class[t_id])
+            if cached is None:
+                # edge signature for caching: bytes of the filtered bitset rows in
+                # lexicographic order (order independent, stable across runs)
+                sub = bits[keep]
+                sig = sub[np.lexsort(sub.T[::-1])].tobytes()
+                cached = cache.get(sig)
+            if cached is not None:
+                g, st = cached
                 gamma_details[t] = GammaResult(
                     gamma=g,
                     status=st,
                     runtime_ms=0,
-                    n_edges=len(filtered),
+                    n_edges=n_kept,
                     n_nodes=len(all_nodes),
                 )
                 rho[t] = 1.0 / (1.0 + g)
                 continue
 
-        # get greedy upper bound
-        ub = greedy_hitting_set_size(filtered)
+        # get greedy upper bound (and warm start)
+        greedy = greedy_hitting_set_bits(bits, keep)
+        ub = len(greedy)
+        lb = matching_lower_bound_bits(bits, keep, order=by_size)
         # solve exact/timeout
-        import time as _time
-        t0 = _time.time()
-        g, st = solve_min_hitting_set_size_cpsat(filtered, time_limit_s=time_limit_s, upper_bound=ub)
-        dt_ms = int((_time.time() - t0) * 1000)
-
-        # fallback if timeout with no solution (should not happen with ub, but guard)
+        t0 = time.time()
+        if lb == ub:
+            # greedy already meets the matching bound: optimal without CP-SAT
+            g, st = ub, "OPTIMAL"
+        else:
+            g, st = hs_model.solve(keep, hint=greedy, lower_bound=lb, upper_bound=ub)
+        dt_ms = int((time.time() - t0) * 1000)
+
+        # fallback if timeout with no solution
         if g < 0:
             g = ub
             st = "TIMEOUT"
 
-        if enable_cache and sig is not None:
+        if enable_cache:
+            class_cache[inc_class[t_id]] = (g, st)
             cache[sig] = (g, st)
 
         gamma_details[t] = GammaResult(
             gamma=g,
             status=st,
             runtime_ms=dt_ms,
-            n_edges=len(filtered),
+            n_edges=n_kept,
             n_nodes=len(all_nodes),
         )
         rho[t] = 1.0 / (1.0 + g)
@@ -199,38 +409,117 @@ def compute_rim_for_dc(
         # degenerate, shouldn't happen
         return {}, gamma_details
 
-    rim_contrib = {t: (rho[t] / denom) * m for t in universe}
+    rim_contrib = {t: (rho[t] / denom) * m for t in all_nodes}
     return rim_contrib, gamma_details
 
 
+def _cache_path(mis_path: Path, time_limit_s: float, num_workers: int, cache_dir: Path) -> Path:
+    """
+    Disk cache file of one DC: content hash of its MIS file plus the CP-SAT
+    time limit and worker count (timeouts make Gamma depend on both) and
+    the code tag of this module.
+    """
+    h = hashlib.blake2b(mis_path.read_bytes(), digest_size=16)
+    h.update(repr((float(time_limit_s), max(1, int(num_workers)))).encode())
+    h.update(_CODE_TAG)
+    return cache_dir / f"{h.hexdigest()}.pkl"
+
+
+def _write_atomic(path: Path, data: bytes) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    tmp = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+    tmp.write_bytes(data)
+    os.replace(tmp, path)
+
+
 def compute_rim(
     mis_dir: Path,
     dcs: List[str],
     time_limit_s: float = 1.0,
     enable_cache: bool = True,
+    num_workers: int = 8,
+    dc_workers: int = 1,
+    cache_dir: Optional[Path] = None,
+) -> Tuple[Dict[TupleKey, float], Dict[str, Dict[TupleKey, GammaResult]]]:
+    mis_by_dc = load_all(mis_dir, dcs)
+    return compute_rim_from(
+        mis_by_dc,
+        time_limit_s=time_limit_s,
+        enable_cache=enable_cache,
+        num_workers=num_workers,
+        dc_workers=dc_workers,
+        mis_paths={dc: mis_file_path(mis_dir, dc) for dc in mis_by_dc},
+        cache_dir=cache_dir,
+    )
+
+
+def _rim_for_dc_task(task) -> Tuple[Dict[TupleKey, float], Dict[TupleKey, GammaResult]]:
+    mis_list, time_limit_s, enable_cache, num_workers = task
+    return compute_rim_for_dc(
+        mis_list=mis_list,
+        time_limit_s=time_limit_s,
+        enable_cache=enable_cache,
+        num_workers=num_workers,
+    )
+
+
+def compute_rim_from(
+    mis_by_dc: Dict[str, List[MIS]],
+    time_limit_s: float = 1.0,
+    enable_cache: bool = True,
+    num_workers: int = 8,
+    dc_workers: int = 1,
+    mis_paths: Optional[Dict[str, Path]] = None,
+    cache_dir: Optional[Path] = None,
+    cache_hits: Optional[List[str]] = None,
 ) -> Tuple[Dict[TupleKey, float], Dict[str, Dict[TupleKey, GammaResult]]]:
     """
     Full RIM across DCs:
       RIM(t) = sum_{dc} rho'(t,dc) * |MIS(dc)|
+    DCs are independent; with dc_workers > 1 they are solved in a process
+    pool (num_workers is then the CP-SAT worker count of each DC).
+    mis_paths: MIS file of each DC; the DCs listed there are looked up in
+    (and written to) the disk cache under cache_dir (None, the default,
+    disables it).
+    cache_hits: if given, the DCs read from the disk cache are appended to it.
     Returns:
       scores: per tuple RIM
       gamma_log: per dc -> per tuple -> GammaResult
     """
-    total: Dict[TupleKey, float] = defaultdict(float)
     gamma_log: Dict[str, Dict[TupleKey, GammaResult]] = {}
 
+    dcs = list(mis_by_dc)
+    results: Dict[str, Tuple[Dict[TupleKey, float], Dict[TupleKey, GammaResult]]] = {}
+    cache_files: Dict[str, Path] = {}
+    if cache_dir is not None and mis_paths:
+        for dc in dcs:
+            path = mis_paths.get(dc)
+            if path is None or not path.exists():
+                continue
+            ck = cache_files[dc] = _cache_path(path, time_limit_s, num_workers, cache_dir)
+            if ck.exists():
+                results[dc] = pickle.loads(ck.read_bytes())
+                if cache_hits is not None:
+                    cache_hits.append(dc)
+
+    todo = [dc for dc in dcs if dc not in results]
+    tasks = [(mis_by_dc[dc], time_limit_s, enable_cache, num_workers) for dc in todo]
+    if dc_workers > 1 and len(todo) > 1:
+        with ProcessPoolExecutor(max_workers=min(dc_workers, len(todo))) as ex:
+            computed = list(ex.map(_rim_for_dc_task, tasks))
+    else:
+        computed = [_rim_for_dc_task(task) for task in tasks]
+    for dc, res in zip(todo, computed):
+        results[dc] = res
+        if dc in cache_files:
+            _write_atomic(cache_files[dc], pickle.dumps(res, protocol=pickle.HIGHEST_PROTOCOL))
+
+    keys: List[TupleKey] = []
+    weights: List[float] = []
     for dc in dcs:
-        path = mis_dir / f"{dc}.json"
-        if not path.exists():
-            continue
-        mis_list = load_mis_file(path)
-        rim_dc, gamma_details = compute_rim_for_dc(
-            mis_list=mis_list,
-            time_limit_s=time_limit_s,
-            enable_cache=enable_cache,
-        )
-        for t, v in rim_dc.items():
-            total[t] += float(v)
+        rim_dc, gamma_details = results[dc]
+        keys.extend(rim_dc)
+        weights.extend(rim_dc.values())
         gamma_log[dc] = gamma_details
 
-    return dict(total), gamma_log
+    return scatter_scores(keys, weights), gamma_log
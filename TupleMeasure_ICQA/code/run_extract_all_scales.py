@@ -3,7 +3,9 @@
 
 import os
 import argparse
-import subprocess
+from concurrent.futures import ProcessPoolExecutor
+
+from extract_mis import run_one as extract_one
 
 # ========= configuration =========
 
@@ -18,8 +20,6 @@ RATIOS = ["0p01pct", "0p05pct", "0p1pct"]
 
 SEEDS = [f"seed{i:02d}" for i in range(1, 11)]
 
-EXTRACT_SCRIPT = os.path.join(BASE_DIR, "code", "extract_mis.py")
-
 
 # ========= functions =========
 
@@ -29,27 +29,42 @@ def find_single_duckdb(case_dir: str) -> str | None:
     Return its absolute path, or None if not found.
     Raise if multiple duckdb files exist (to avoid ambiguity).
     """
-    if not os.path.isdir(case_dir):
+    try:
+        it = os.scandir(case_dir)
+    except (FileNotFoundError, NotADirectoryError):
         return None
 
-    duckdb_files = [f for f in os.listdir(case_dir) if f.endswith(".duckdb")]
-    if len(duckdb_files) == 0:
-        return None
-    if len(duckdb_files) > 1:
-        raise RuntimeError(f"Multiple .duckdb files in {case_dir}: {duckdb_files}")
+    # stop at the second match: that is already an error
+    found = None
+    with it:
+        for de in it:
+            if de.name.endswith(".duckdb"):
+                if found is not None:
+                    raise RuntimeError(
+                        f"Multiple .duckdb files in {case_dir}: {[os.path.basename(found), de.name]}"
+                    )
+                found = de.path
+    return found
 
-    return os.path.join(case_dir, duckdb_files[0])
 
+def extract_task(task) -> None:
+    db_path, out_dir, label, duckdb_config = task
+    print(f"[RUN] {label}")
+    extract_one(db_path, out_dir, duckdb_config=duckdb_config)
 
-def run_for_scale(scale: str, force: bool = False):
+
+def collect_scale_tasks(scale: str, force: bool = False):
+    """
+    (db_path, out_dir, label) of every case of one scale still to extract.
+    """
     print(f"\n===== Processing {scale} =====")
 
     violations_root = os.path.join(BASE_DIR, "violations", scale)
     if not os.path.isdir(violations_root):
         print(f"[WARN] violations root not found: {violations_root}")
-        return 0
+        return []
 
-    total = 0
+    tasks = []
     skipped_existing = 0
 
     for subset in DC_SUBSETS:
@@ -72,19 +87,10 @@ def run_for_scale(scale: str, force: bool = False):
                     skipped_existing += 1
                     continue
 
-                cmd = [
-                    "python",
-                    EXTRACT_SCRIPT,
-                    "--db", db_path,
-                    "--out", out_dir
-                ]
-
-                print(f"[RUN] {scale} | {subset} | {ratio} | {seed}")
-                subprocess.run(cmd, check=True)
-                total += 1
+                tasks.append((db_path, out_dir, f"{scale} | {subset} | {ratio} | {seed}"))
 
-    print(f"[DONE] {scale}: {total} cases processed. ({skipped_existing} skipped existing)")
-    return total
+    print(f"[INFO] {scale}: {len(tasks)} cases to extract. ({skipped_existing} skipped existing)")
+    return tasks
 
 
 def main():
@@ -94,13 +100,26 @@ def main():
         action="store_true",
         help="Re-extract MIS even if mis/index.json already exists."
     )
+    parser.add_argument(
+        "--workers",
+        type=int,
+        default=os.cpu_count() or 1,
+        help="Cases extracted in parallel (worker processes)."
+    )
     args = parser.parse_args()
 
-    grand_total = 0
+    tasks = []
     for scale in SCALES:
-        grand_total += run_for_scale(scale, force=args.force)
+        tasks.extend(collect_scale_tasks(scale, force=args.force))
+
+    # cases are independent: extract them in a process pool, one DuckDB
+    # connection per case, splitting the cores between the workers
+    n_workers = max(1, args.workers)
+    duckdb_config = {"threads": str(max(1, (os.cpu_count() or 1) // n_workers))}
+    with ProcessPoolExecutor(max_workers=n_workers) as ex:
+        list(ex.map(extract_task, [(*t, duckdb_config) for t in tasks]))
 
-    print(f"\nALL SCALES FINISHED. Total processed: {grand_total}")
+    print(f"\nALL SCALES FINISHED. Total processed: {len(tasks)}")
 
 
 if __name__ == "__main__":
@@ -2,19 +2,28 @@
 from __future__ import annotations
 
 import argparse
-import json
 import time
+from concurrent.futures import ProcessPoolExecutor
 from pathlib import Path
 from typing import Dict, List, Tuple
 
+import orjson
 import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
 
-from measures.common import discover_db_instances, TupleKey
-from measures import compute_cim, compute_pim, compute_cbm, compute_rim
+from measures.common import discover_db_instances, load_all, mis_file_path, TupleKey
+from measures import compute_cim_from, compute_pim_from, compute_cbm_from, compute_rim_from
+from measures.rim import RIM_CACHE_DIR
 
 
 DEFAULT_DCS = ["DC1", "DC2", "DC3", "DC4"]
 
+SCORES_SCHEMA = pa.schema(
+    [(c, pa.large_string()) for c in ["scale", "subset", "ratio", "seed", "db_id", "relation", "pk", "measure"]]
+    + [("value", pa.float64())]
+)
+
 
 def tuplekey_to_cols(tk: TupleKey) -> Tuple[str, str]:
     rel, pk = tk
@@ -24,23 +33,100 @@ def tuplekey_to_cols(tk: TupleKey) -> Tuple[str, str]:
 
 
 def scores_to_df(db, measure_name: str, scores: Dict[TupleKey, float]) -> pd.DataFrame:
-    rows = []
-    for tk, v in scores.items():
-        rel, pk_str = tuplekey_to_cols(tk)
-        rows.append(
-            {
-                "scale": db.scale,
-                "subset": db.subset,
-                "ratio": db.ratio,
-                "seed": db.seed,
-                "db_id": db.db_id,
-                "relation": rel,
-                "pk": pk_str,
-                "measure": measure_name,
-                "value": float(v),
-            }
+    # built column-wise; DB key / measure columns are broadcast scalars
+    cols = [tuplekey_to_cols(tk) for tk in scores]
+    return pd.DataFrame(
+        {
+            "scale": db.scale,
+            "subset": db.subset,
+            "ratio": db.ratio,
+            "seed": db.seed,
+            "db_id": db.db_id,
+            "relation": [rel for rel, _ in cols],
+            "pk": [pk_str for _, pk_str in cols],
+            "measure": measure_name,
+            "value": [float(v) for v in scores.values()],
+        },
+        index=pd.RangeIndex(len(cols)),
+    )
+
+
+def compute_all(task) -> Tuple[List[pd.DataFrame], List[dict]]:
+    """
+    All requested measures of one DB instance (run in a worker process).
+    Writes the RIM gamma log of the DB; returns (score dfs, runtime rows).
+    """
+    (db, dcs, measures, out_root, rim_time_limit_s, rim_cache, rim_search_workers, rim_dc_workers,
+     rim_cache_dir) = task
+    score_dfs: List[pd.DataFrame] = []
+    runtime_rows: List[dict] = []
+
+    # parse each DC's MIS file once, shared by all measures; each measure
+    # used to parse the files itself, so this time is added to every
+    # measure's seconds (and kept apart in load_seconds)
+    t0 = time.time()
+    mis_by_dc = load_all(db.mis_dir, dcs)
+    load_dt = time.time() - t0
+
+    # CIM
+    if "CIM" in measures:
+        t0 = time.time()
+        scores = compute_cim_from(mis_by_dc)
+        dt = time.time() - t0
+        score_dfs.append(scores_to_df(db, "CIM", scores))
+        runtime_rows.append({"db_id": db.db_id, "measure": "CIM", "seconds": load_dt + dt,
+                             "load_seconds": load_dt, "nonzero": len(scores), "cached_dcs": 0})
+
+    # PIM
+    if "PIM" in measures:
+        t0 = time.time()
+        scores = compute_pim_from(mis_by_dc)
+        dt = time.time() - t0
+        score_dfs.append(scores_to_df(db, "PIM", scores))
+        runtime_rows.append({"db_id": db.db_id, "measure": "PIM", "seconds": load_dt + dt,
+                             "load_seconds": load_dt, "nonzero": len(scores), "cached_dcs": 0})
+
+    # CBM
+    if "CBM" in measures:
+        t0 = time.time()
+        scores = compute_cbm_from(mis_by_dc)
+        dt = time.time() - t0
+        score_dfs.append(scores_to_df(db, "CBM", scores))
+        runtime_rows.append({"db_id": db.db_id, "measure": "CBM", "seconds": load_dt + dt,
+                             "load_seconds": load_dt, "nonzero": len(scores), "cached_dcs": 0})
+
+    # RIM
+    if "RIM" in measures:
+        # DCs read from the disk cache: their time is a file read, not a solve
+        cached_dcs: List[str] = []
+        t0 = time.time()
+        scores, gamma_log = compute_rim_from(
+            mis_by_dc,
+            time_limit_s=rim_time_limit_s,
+            enable_cache=rim_cache,
+            num_workers=rim_search_workers,
+            dc_workers=rim_dc_workers,
+            mis_paths={dc: mis_file_path(db.mis_dir, dc) for dc in mis_by_dc},
+            cache_dir=rim_cache_dir,
+            cache_hits=cached_dcs,
         )
-    return pd.DataFrame(rows)
+        dt = time.time() - t0
+        score_dfs.append(scores_to_df(db, "RIM", scores))
+        runtime_rows.append({"db_id": db.db_id, "measure": "RIM", "seconds": load_dt + dt,
+                             "load_seconds": load_dt, "nonzero": len(scores), "cached_dcs": len(cached_dcs)})
+
+        # write gamma details per DB (json) for debugging / later analysis
+        gamma_out = out_root / "gamma" / (db.db_id.replace("/", "__") + ".gamma.json")
+        gamma_out.parent.mkdir(parents=True, exist_ok=True)
+        # GammaResult dataclasses are serialized by orjson as
+        # {"gamma", "status", "runtime_ms", "n_edges", "n_nodes"} objects
+        serial = {
+            dc: {f"{rel}:{','.join(map(str, pk))}": gr for (rel, pk), gr in per_t.items()}
+            for dc, per_t in gamma_log.items()
+        }
+        gamma_out.write_bytes(orjson.dumps(serial))
+
+    return score_dfs, runtime_rows
 
 
 def main():
@@ -53,6 +139,20 @@ def main():
     ap.add_argument("--rim_time_limit_s", type=float, default=1.0)
     ap.add_argument("--rim_cache", action="store_true", default=True)
     ap.add_argument("--no_rim_cache", action="store_true", default=False)
+    ap.add_argument("--workers", type=int, default=1,
+                    help="worker processes (DB instances in parallel); with more than 1 the DBs compete "
+                         "for cores and memory, so the recorded runtimes are not comparable to serial runs")
+    ap.add_argument("--rim_search_workers", type=int, default=8,
+                    help="CP-SAT search workers per RIM solve. Fewer workers make more solves hit "
+                         "--rim_time_limit_s and fall back to the greedy bound, which changes RIM values; "
+                         "more than cpu_count // (workers * rim_dc_workers) oversubscribes the cores")
+    ap.add_argument("--rim_dc_workers", type=int, default=1,
+                    help="processes per DB instance solving RIM DCs in parallel")
+    ap.add_argument("--rim_disk_cache", action="store_true", default=False,
+                    help="reuse per-DC RIM results from --rim_cache_dir (cache hits are counted in "
+                         "the runtimes' cached_dcs column, their seconds are not solve times)")
+    ap.add_argument("--rim_cache_dir", type=str, default=str(RIM_CACHE_DIR),
+                    help="on-disk cache of per-DC RIM results, keyed by MIS file contents and solver settings")
     ap.add_argument("--limit", type=int, default=0, help="limit number of DB instances (0 = all)")
     args = ap.parse_args()
 
@@ -67,95 +167,51 @@ def main():
     measures = [x.strip().upper() for x in args.measures.split(",") if x.strip()]
 
     rim_cache = args.rim_cache and (not args.no_rim_cache)
+    rim_cache_dir = Path(args.rim_cache_dir) if args.rim_disk_cache else None
+    n_workers = max(1, args.workers)
+    rim_dc_workers = max(1, args.rim_dc_workers)
+    rim_search_workers = max(1, args.rim_search_workers)
 
     instances = discover_db_instances(violations_root)
     if args.limit and args.limit > 0:
         instances = instances[: args.limit]
 
-    all_score_dfs: List[pd.DataFrame] = []
     runtime_rows = []
 
-    for idx, db in enumerate(instances, 1):
-        print(f"[{idx}/{len(instances)}] {db.db_id}")
-        # CIM
-        if "CIM" in measures:
-            t0 = time.time()
-            scores = compute_cim(db.mis_dir, dcs)
-            dt = time.time() - t0
-            all_score_dfs.append(scores_to_df(db, "CIM", scores))
-            runtime_rows.append({"db_id": db.db_id, "measure": "CIM", "seconds": dt, "nonzero": len(scores)})
-
-        # PIM
-        if "PIM" in measures:
-            t0 = time.time()
-            scores = compute_pim(db.mis_dir, dcs)
-            dt = time.time() - t0
-            all_score_dfs.append(scores_to_df(db, "PIM", scores))
-            runtime_rows.append({"db_id": db.db_id, "measure": "PIM", "seconds": dt, "nonzero": len(scores)})
-
-        # CBM
-        if "CBM" in measures:
-            t0 = time.time()
-            scores = compute_cbm(db.mis_dir, dcs)
-            dt = time.time() - t0
-            all_score_dfs.append(scores_to_df(db, "CBM", scores))
-            runtime_rows.append({"db_id": db.db_id, "measure": "CBM", "seconds": dt, "nonzero": len(scores)})
-
-        # RIM
-        if "RIM" in measures:
-            t0 = time.time()
-            scores, gamma_log = compute_rim(
-                db.mis_dir, dcs, time_limit_s=args.rim_time_limit_s, enable_cache=rim_cache
-            )
-            dt = time.time() - t0
-            all_score_dfs.append(scores_to_df(db, "RIM", scores))
-            runtime_rows.append({"db_id": db.db_id, "measure": "RIM", "seconds": dt, "nonzero": len(scores)})
-
-            # write gamma details per DB (json) for debugging / later analysis
-            gamma_out = out_root / "gamma" / (db.db_id.replace("/", "__") + ".gamma.json")
-            gamma_out.parent.mkdir(parents=True, exist_ok=True)
-            # convert to jsonable
-            serial = {}
-            for dc, per_t in gamma_log.items():
-                serial[dc] = {}
-                for (rel, pk), gr in per_t.items():
-                    key = f"{rel}:{','.join(map(str, pk))}"
-                    serial[dc][key] = {
-                        "gamma": gr.gamma,
-                        "status": gr.status,
-                        "runtime_ms": gr.runtime_ms,
-                        "n_edges": gr.n_edges,
-                        "n_nodes": gr.n_nodes,
-                    }
-            gamma_out.write_text(json.dumps(serial, ensure_ascii=False))
-
-    # concat & write outputs
-    if all_score_dfs:
-        scores_df = pd.concat(all_score_dfs, ignore_index=True)
-    else:
-        scores_df = pd.DataFrame(columns=["scale", "subset", "ratio", "seed", "db_id", "relation", "pk", "measure", "value"])
+    # score frames are streamed into one parquet file as the workers return
+    scores_path = out_root / "scores" / "tuple_measures.parquet"
+    writer = pq.ParquetWriter(scores_path, SCORES_SCHEMA)
+
+    # DB instances are independent: one worker process per instance
+    tasks = [
+        (db, dcs, measures, out_root, args.rim_time_limit_s, rim_cache, rim_search_workers, rim_dc_workers,
+         rim_cache_dir)
+        for db in instances
+    ]
+    with writer, ProcessPoolExecutor(max_workers=n_workers) as ex:
+        for idx, (db, (score_dfs, rt_rows)) in enumerate(
+            zip(instances, ex.map(compute_all, tasks, chunksize=4)), 1
+        ):
+            print(f"[{idx}/{len(instances)}] {db.db_id}")
+            for df in score_dfs:
+                writer.write_table(pa.Table.from_pandas(df, schema=SCORES_SCHEMA, preserve_index=False))
+            runtime_rows.extend(rt_rows)
+    print(f"Wrote: {scores_path}")
 
     runtimes_df = pd.DataFrame(runtime_rows)
 
     # parquet preferred
     try:
-        scores_path = out_root / "scores" / "tuple_measures.parquet"
-        scores_df.to_parquet(scores_path, index=False)
         rt_path = out_root / "runtimes" / "runtimes.parquet"
         runtimes_df.to_parquet(rt_path, index=False)
-        print(f"Wrote: {scores_path}")
         print(f"Wrote: {rt_path}")
     except Exception as e:
         # fallback csv
-        scores_path = out_root / "scores" / "tuple_measures.csv"
-        scores_df.to_csv(scores_path, index=False)
         rt_path = out_root / "runtimes" / "runtimes.csv"
         runtimes_df.to_csv(rt_path, index=False)
         print(f"Parquet failed ({e}); wrote CSV instead.")
-        print(f"Wrote: {scores_path}")
         print(f"Wrote: {rt_path}")
 
-
 if __name__ == "__main__":
     main()
 
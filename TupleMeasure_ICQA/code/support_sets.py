@@ -11,10 +11,6 @@ For each DB file and each query, we generate one parquet file:
 
 schema (per-DB file):
 
-    scale       STRING  -- e.g., 'sf0.1'
-    subset      STRING  -- 'subsetA' / 'subsetB'
-    ratio       STRING  -- '0p01pct' / '0p05pct' / '0p1pct'
-    seed        STRING  -- 'seed01'..'seed10'
     qname       STRING  -- 'Q1'..'Q5'
     answer_id   BIGINT
     support_id  BIGINT
@@ -23,21 +19,38 @@ schema (per-DB file):
     key1..key4  BIGINT (some NULL)
     pk          VARCHAR -- primary key string used in tuple_measures
 
+The DB key is not stored in the files but in their hive-style directory
+(read back with hive_partitioning):
+
+    scale       STRING  -- e.g., 'sf0.1'
+    subset      STRING  -- 'subsetA' / 'subsetB'
+    ratio       STRING  -- '0p01pct' / '0p05pct' / '0p1pct'
+    seed        STRING  -- 'seed01'..'seed10'
+
 Directory example:
 
 violations/sf0.1/subsetB/0p01pct/seed09/tpch_subsetB_0p01pct_seed09.duckdb
- → support_sets/sf0.1/subsetB/0p01pct/seed09/Q5_support.parquet
+ → support_sets/scale=sf0.1/subset=subsetB/ratio=0p01pct/seed=seed09/Q5_support.parquet
 
-Additionally, we build a merged file:
+Instead of a merged copy of all rows, we write the definition of a
+DuckDB view over the per-DB files:
 
-    support_sets/all_support_sets.parquet
+    support_sets/all_support_sets.sql
 
-which is simply the union (via DuckDB) of all per-DB files above.
+which defines `all_support_sets` as the union of all per-DB files above,
+with the DB key columns filled in from the paths (run it on a connection,
+then query the view).
 """
 
 from __future__ import annotations
 
+import os
+from concurrent.futures import ProcessPoolExecutor
+
 import duckdb
+import pyarrow as pa
+import pyarrow.compute as pc
+import pyarrow.parquet as pq
 from pathlib import Path
 
 # ---------------------------------------------------------------------------
@@ -46,19 +59,51 @@ from pathlib import Path
 
 VIOLATIONS_BASE = Path("/Users/Desktop/tpchdata/violations")
 SUPPORT_BASE    = Path("/Users/Desktop/tpchdata/support_sets")
-MERGED_OUT      = SUPPORT_BASE / "all_support_sets.parquet"
+SUPPORT_VIEW    = SUPPORT_BASE / "all_support_sets.sql"
 
 QUERIES = ["Q1", "Q2", "Q3", "Q4", "Q5"]
 
+# DBs are extracted in a process pool; each worker's DuckDB gets this many
+# threads (workers = cpu_count // THREADS_PER_DB) and this memory limit.
+THREADS_PER_DB = 2
+MEMORY_LIMIT_PER_DB = "4GB"
+
+# Parquet writer options of the per-DB files (DuckDB's default row group size)
+PARQUET_OPTIONS = {"compression": "zstd", "compression_level": 3, "row_group_size": 122880}
+
 TPCH_SUPPORT_SQL: dict[str, str] = {}
 
+# orders ⋈ lineitem rows in the date windows of Q2/Q4/Q5, joined once per DB
+# into a temp table that the three queries read instead of joining again
+ORD_LINE_SQL = r"""
+CREATE OR REPLACE TEMP TABLE ord_line AS
+SELECT
+    o.o_orderkey,
+    o.o_orderdate,
+    l.l_orderkey,
+    l.l_linenumber,
+    l.l_suppkey,
+    l.l_quantity,
+    l.l_discount,
+    l.l_shipmode,
+    l.l_shipinstruct,
+    l.l_shipdate
+FROM orders   AS o
+JOIN lineitem AS l ON l.l_orderkey = o.o_orderkey
+WHERE (o.o_orderdate >= DATE '1995-03-15' AND o.o_orderdate < DATE '1995-03-18')  -- Q2
+   OR (o.o_orderdate >= DATE '1995-02-01' AND o.o_orderdate < DATE '1995-02-06')  -- Q4
+   OR (o.o_orderdate >= DATE '1995-04-01' AND o.o_orderdate < DATE '1995-04-06')  -- Q5
+"""
+
 # ---------------------------------------------------------------------------
-# Q1–Q5 SQL (without meta，meta wraps a layer outside)
+# Q1–Q5 SQL (without meta, which is in the output path, and without pk,
+# which support_pk adds on the Arrow side)
 # ---------------------------------------------------------------------------
 
 TPCH_SUPPORT_SQL["Q1"] = r"""
 WITH base AS (
-    SELECT
+    -- deduplicated once here, so the support rows below need no DISTINCT
+    SELECT DISTINCT
         o_orderkey,
         o_orderpriority
     FROM orders
@@ -67,31 +112,23 @@ WITH base AS (
       AND o_orderdate <  DATE '1995-03-11'
       AND o_totalprice > 70000
 ),
-answers AS (
-    SELECT DISTINCT
-        o_orderpriority AS answervalue
-    FROM base
-),
-ranked AS (
-    SELECT
-        answervalue,
-        ROW_NUMBER() OVER (ORDER BY answervalue) AS answer_id
-    FROM answers
-),
 witnesses AS (
+    -- answer_id numbers the distinct answer values in order, straight from
+    -- base (no separate answers/ranked CTEs joined back)
     SELECT
-        r.answer_id,
-        r.answervalue,
+        DENSE_RANK() OVER (ORDER BY b.o_orderpriority) AS answer_id,
+        b.o_orderpriority AS answervalue,
+        -- witnesses numbered by their keys, so support_id is the same on
+        -- every run (the scan order is not, with parallel threads)
         ROW_NUMBER() OVER (
-            PARTITION BY r.answer_id
+            PARTITION BY b.o_orderpriority
             ORDER BY b.o_orderkey
         ) AS support_id,
         b.o_orderkey
-    FROM ranked r
-    JOIN base   b ON b.o_orderpriority = r.answervalue
+    FROM base b
 ),
 orders_support AS (
-    SELECT DISTINCT
+    SELECT
         answer_id,
         support_id,
         answervalue,
@@ -114,82 +151,60 @@ SELECT
     key1,
     key2,
     key3,
-    key4,
-    CAST(key1 AS VARCHAR) AS pk
-FROM support_flat
-ORDER BY answer_id, support_id, rel, key1, key2;
+    key4
+FROM support_flat;
 """
 
 TPCH_SUPPORT_SQL["Q2"] = r"""
 WITH base AS (
-    SELECT
-        o.o_orderkey,
-        l.l_orderkey,
-        l.l_linenumber,
-        l.l_shipmode
-    FROM orders   AS o
-    JOIN lineitem AS l
-      ON l.l_orderkey = o.o_orderkey
-    WHERE l.l_shipmode IN ('AIR', 'SHIP', 'TRUCK', 'MAIL')
-      AND o.o_orderdate >= DATE '1995-03-15'
-      AND o.o_orderdate <  DATE '1995-03-18'
-      AND l.l_quantity > 30
-      AND l.l_discount BETWEEN 0.04 AND 0.08
-      AND l.l_shipinstruct IN ('DELIVER IN PERSON', 'COLLECT COD')
-),
-answers AS (
+    -- deduplicated once here, so the support rows below need no DISTINCT
     SELECT DISTINCT
-        l_shipmode AS answervalue
-    FROM base
-),
-ranked AS (
-    SELECT
-        answervalue,
-        ROW_NUMBER() OVER (ORDER BY answervalue) AS answer_id
-    FROM answers
+        ol.o_orderkey,
+        ol.l_orderkey,
+        ol.l_linenumber,
+        ol.l_shipmode
+    FROM ord_line AS ol
+    WHERE ol.l_shipmode IN ('AIR', 'SHIP', 'TRUCK', 'MAIL')
+      AND ol.o_orderdate >= DATE '1995-03-15'
+      AND ol.o_orderdate <  DATE '1995-03-18'
+      AND ol.l_quantity > 30
+      AND ol.l_discount BETWEEN 0.04 AND 0.08
+      AND ol.l_shipinstruct IN ('DELIVER IN PERSON', 'COLLECT COD')
 ),
 witnesses AS (
+    -- answer_id numbers the distinct answer values in order, straight from
+    -- base (no separate answers/ranked CTEs joined back)
     SELECT
-        r.answer_id,
-        r.answervalue,
+        DENSE_RANK() OVER (ORDER BY b.l_shipmode) AS answer_id,
+        b.l_shipmode AS answervalue,
+        -- witnesses numbered by their keys, so support_id is the same on
+        -- every run (the scan order is not, with parallel threads)
         ROW_NUMBER() OVER (
-            PARTITION BY r.answer_id
+            PARTITION BY b.l_shipmode
             ORDER BY b.o_orderkey, b.l_orderkey, b.l_linenumber
         ) AS support_id,
         b.o_orderkey,
         b.l_orderkey,
         b.l_linenumber
-    FROM ranked r
-    JOIN base   b ON b.l_shipmode = r.answervalue
-),
-orders_support AS (
-    SELECT DISTINCT
-        answer_id,
-        support_id,
-        answervalue,
-        'orders' AS rel,
-        o_orderkey::BIGINT AS key1,
-        NULL::BIGINT      AS key2,
-        NULL::BIGINT      AS key3,
-        NULL::BIGINT      AS key4
-    FROM witnesses
-),
-lineitem_support AS (
-    SELECT DISTINCT
-        answer_id,
-        support_id,
-        answervalue,
-        'lineitem' AS rel,
-        l_orderkey::BIGINT   AS key1,
-        l_linenumber::BIGINT AS key2,
-        NULL::BIGINT         AS key3,
-        NULL::BIGINT         AS key4
-    FROM witnesses
+    FROM base b
 ),
 support_flat AS (
-    SELECT * FROM orders_support
-    UNION ALL
-    SELECT * FROM lineitem_support
+    -- one scan of witnesses, one row per (witness, relation)
+    SELECT
+        w.answer_id,
+        w.support_id,
+        w.answervalue,
+        v.rel,
+        v.key1,
+        v.key2,
+        NULL::BIGINT AS key3,
+        NULL::BIGINT AS key4
+    FROM witnesses w
+    CROSS JOIN (
+        VALUES
+        ('orders', w.o_orderkey::BIGINT, NULL::BIGINT),
+        ('lineitem', w.l_orderkey::BIGINT, w.l_linenumber::BIGINT)
+    ) AS v(rel, key1, key2)
 )
 SELECT
     'Q2' AS qname,
@@ -200,20 +215,14 @@ SELECT
     key1,
     key2,
     key3,
-    key4,
-    CASE
-        WHEN rel = 'lineitem' THEN
-            CAST(key1 AS VARCHAR) || ',' || CAST(key2 AS VARCHAR)
-        ELSE
-            CAST(key1 AS VARCHAR)
-    END AS pk
-FROM support_flat
-ORDER BY answer_id, support_id, rel, key1, key2;
+    key4
+FROM support_flat;
 """
 
 TPCH_SUPPORT_SQL["Q3"] = r"""
 WITH base AS (
-    SELECT
+    -- deduplicated once here, so the support rows below need no DISTINCT
+    SELECT DISTINCT
         c.c_custkey,
         o.o_orderkey,
         n.n_nationkey,
@@ -226,73 +235,41 @@ WITH base AS (
       AND o.o_orderdate >= DATE '1995-01-01'
       AND o.o_orderdate <  DATE '1995-01-11'
 ),
-answers AS (
-    SELECT DISTINCT
-        n_name AS answervalue
-    FROM base
-),
-ranked AS (
-    SELECT
-        answervalue,
-        ROW_NUMBER() OVER (ORDER BY answervalue) AS answer_id
-    FROM answers
-),
 witnesses AS (
+    -- answer_id numbers the distinct answer values in order, straight from
+    -- base (no separate answers/ranked CTEs joined back)
     SELECT
-        r.answer_id,
-        r.answervalue,
+        DENSE_RANK() OVER (ORDER BY b.n_name) AS answer_id,
+        b.n_name AS answervalue,
+        -- witnesses numbered by their keys, so support_id is the same on
+        -- every run (the scan order is not, with parallel threads)
         ROW_NUMBER() OVER (
-            PARTITION BY r.answer_id
+            PARTITION BY b.n_name
             ORDER BY b.c_custkey, b.o_orderkey, b.n_nationkey
         ) AS support_id,
         b.c_custkey,
         b.o_orderkey,
         b.n_nationkey
-    FROM ranked r
-    JOIN base   b ON b.n_name = r.answervalue
-),
-customer_support AS (
-    SELECT DISTINCT
-        answer_id,
-        support_id,
-        answervalue,
-        'customer' AS rel,
-        c_custkey::BIGINT AS key1,
-        NULL::BIGINT      AS key2,
-        NULL::BIGINT      AS key3,
-        NULL::BIGINT      AS key4
-    FROM witnesses
-),
-orders_support AS (
-    SELECT DISTINCT
-        answer_id,
-        support_id,
-        answervalue,
-        'orders' AS rel,
-        o_orderkey::BIGINT AS key1,
-        NULL::BIGINT      AS key2,
-        NULL::BIGINT      AS key3,
-        NULL::BIGINT      AS key4
-    FROM witnesses
-),
-nation_support AS (
-    SELECT DISTINCT
-        answer_id,
-        support_id,
-        answervalue,
-        'nation' AS rel,
-        n_nationkey::BIGINT AS key1,
-        NULL::BIGINT       AS key2,
-        NULL::BIGINT       AS key3,
-        NULL::BIGINT       AS key4
-    FROM witnesses
+    FROM base b
 ),
 support_flat AS (
-    SELECT * FROM customer_support
-    UNION ALL
-    SELECT * FROM orders_support
-    UNION ALL
-    SELECT * FROM nation_support
+    -- one scan of witnesses, one row per (witness, relation)
+    SELECT
+        w.answer_id,
+        w.support_id,
+        w.answervalue,
+        v.rel,
+        v.key1,
+        v.key2,
+        NULL::BIGINT AS key3,
+        NULL::BIGINT AS key4
+    FROM witnesses w
+    CROSS JOIN (
+        VALUES
+        ('customer', w.c_custkey::BIGINT, NULL::BIGINT),
+        ('orders', w.o_orderkey::BIGINT, NULL::BIGINT),
+        ('nation', w.n_nationkey::BIGINT, NULL::BIGINT)
+    ) AS v(rel, key1, key2)
 )
 SELECT
     'Q3' AS qname,
@@ -303,49 +280,40 @@ SELECT
     key1,
     key2,
     key3,
-    key4,
-    CAST(key1 AS VARCHAR) AS pk
-FROM support_flat
-ORDER BY answer_id, support_id, rel, key1, key2;
+    key4
+FROM support_flat;
 """
 
 TPCH_SUPPORT_SQL["Q4"] = r"""
 WITH base AS (
-    SELECT
-        o.o_orderkey,
-        l.l_orderkey,
-        l.l_linenumber,
+    -- deduplicated once here, so the support rows below need no DISTINCT
+    SELECT DISTINCT
+        ol.o_orderkey,
+        ol.l_orderkey,
+        ol.l_linenumber,
         s.s_suppkey,
         n.n_nationkey,
         n.n_name
-    FROM orders   AS o
-    JOIN lineitem AS l ON l.l_orderkey  = o.o_orderkey
-    JOIN supplier AS s ON s.s_suppkey   = l.l_suppkey
+    FROM ord_line AS ol
+    JOIN supplier AS s ON s.s_suppkey   = ol.l_suppkey
     JOIN nation   AS n ON n.n_nationkey = s.s_nationkey
     WHERE n.n_name IN ('FRANCE', 'GERMANY', 'BRAZIL')
-      AND o.o_orderdate >= DATE '1995-02-01'
-      AND o.o_orderdate <  DATE '1995-02-06'
-      AND l.l_quantity BETWEEN 25 AND 80
-      AND l.l_shipdate < DATE '1995-03-15'
+      AND ol.o_orderdate >= DATE '1995-02-01'
+      AND ol.o_orderdate <  DATE '1995-02-06'
+      AND ol.l_quantity BETWEEN 25 AND 80
+      AND ol.l_shipdate < DATE '1995-03-15'
       AND s.s_acctbal >= -500
 ),
-answers AS (
-    SELECT DISTINCT
-        n_name AS answervalue
-    FROM base
-),
-ranked AS (
-    SELECT
-        answervalue,
-        ROW_NUMBER() OVER (ORDER BY answervalue) AS answer_id
-    FROM answers
-),
 witnesses AS (
+    -- answer_id numbers the distinct answer values in order, straight from
+    -- base (no separate answers/ranked CTEs joined back)
     SELECT
-        r.answer_id,
-        r.answervalue,
+        DENSE_RANK() OVER (ORDER BY b.n_name) AS answer_id,
+        b.n_name AS answervalue,
+        -- witnesses numbered by their keys, so support_id is the same on
+        -- every run (the scan order is not, with parallel threads)
         ROW_NUMBER() OVER (
-            PARTITION BY r.answer_id
+            PARTITION BY b.n_name
             ORDER BY b.o_orderkey, b.l_orderkey, b.l_linenumber, b.s_suppkey, b.n_nationkey
         ) AS support_id,
         b.o_orderkey,
@@ -353,65 +321,27 @@ witnesses AS (
         b.l_linenumber,
         b.s_suppkey,
         b.n_nationkey
-    FROM ranked r
-    JOIN base   b ON b.n_name = r.answervalue
-),
-orders_support AS (
-    SELECT DISTINCT
-        answer_id,
-        support_id,
-        answervalue,
-        'orders' AS rel,
-        o_orderkey::BIGINT AS key1,
-        NULL::BIGINT      AS key2,
-        NULL::BIGINT      AS key3,
-        NULL::BIGINT      AS key4
-    FROM witnesses
-),
-lineitem_support AS (
-    SELECT DISTINCT
-        answer_id,
-        support_id,
-        answervalue,
-        'lineitem' AS rel,
-        l_orderkey::BIGINT   AS key1,
-        l_linenumber::BIGINT AS key2,
-        NULL::BIGINT         AS key3,
-        NULL::BIGINT         AS key4
-    FROM witnesses
-),
-supplier_support AS (
-    SELECT DISTINCT
-        answer_id,
-        support_id,
-        answervalue,
-        'supplier' AS rel,
-        s_suppkey::BIGINT AS key1,
-        NULL::BIGINT     AS key2,
-        NULL::BIGINT     AS key3,
-        NULL::BIGINT     AS key4
-    FROM witnesses
-),
-nation_support AS (
-    SELECT DISTINCT
-        answer_id,
-        support_id,
-        answervalue,
-        'nation' AS rel,
-        n_nationkey::BIGINT AS key1,
-        NULL::BIGINT       AS key2,
-        NULL::BIGINT       AS key3,
-        NULL::BIGINT       AS key4
-    FROM witnesses
+    FROM base b
 ),
 support_flat AS (
-    SELECT * FROM orders_support
-    UNION ALL
-    SELECT * FROM lineitem_support
-    UNION ALL
-    SELECT * FROM supplier_support
-    UNION ALL
-    SELECT * FROM nation_support
+    -- one scan of witnesses, one row per (witness, relation)
+    SELECT
+        w.answer_id,
+        w.support_id,
+        w.answervalue,
+        v.rel,
+        v.key1,
+        v.key2,
+        NULL::BIGINT AS key3,
+        NULL::BIGINT AS key4
+    FROM witnesses w
+    CROSS JOIN (
+        VALUES
+        ('orders', w.o_orderkey::BIGINT, NULL::BIGINT),
+        ('lineitem', w.l_orderkey::BIGINT, w.l_linenumber::BIGINT),
+        ('supplier', w.s_suppkey::BIGINT, NULL::BIGINT),
+        ('nation', w.n_nationkey::BIGINT, NULL::BIGINT)
+    ) AS v(rel, key1, key2)
 )
 SELECT
     'Q4' AS qname,
@@ -422,58 +352,43 @@ SELECT
     key1,
     key2,
     key3,
-    key4,
-    CASE
-        WHEN rel = 'lineitem' THEN
-            CAST(key1 AS VARCHAR) || ',' || CAST(key2 AS VARCHAR)
-        ELSE
-            CAST(key1 AS VARCHAR)
-    END AS pk
-FROM support_flat
-ORDER BY answer_id, support_id, rel, key1, key2;
+    key4
+FROM support_flat;
 """
 
 TPCH_SUPPORT_SQL["Q5"] = r"""
 WITH base AS (
-    SELECT
-        o.o_orderkey,
-        l.l_orderkey,
-        l.l_linenumber,
+    -- deduplicated once here, so the support rows below need no DISTINCT
+    SELECT DISTINCT
+        ol.o_orderkey,
+        ol.l_orderkey,
+        ol.l_linenumber,
         s.s_suppkey,
         n.n_nationkey,
         r.r_regionkey,
         r.r_name
-    FROM orders   AS o
-    JOIN lineitem AS l ON l.l_orderkey  = o.o_orderkey
-    JOIN supplier AS s ON s.s_suppkey   = l.l_suppkey
+    FROM ord_line AS ol
+    JOIN supplier AS s ON s.s_suppkey   = ol.l_suppkey
     JOIN nation   AS n ON n.n_nationkey = s.s_nationkey
     JOIN region   AS r ON r.r_regionkey = n.n_regionkey
     WHERE r.r_name IN ('EUROPE', 'ASIA', 'AMERICA', 'AFRICA')
-      AND o.o_orderdate >= DATE '1995-04-01'
-      AND o.o_orderdate <  DATE '1995-04-06'
-      AND l.l_quantity > 25
-      AND l.l_discount BETWEEN 0.02 AND 0.08
-      AND l.l_shipmode IN ('AIR', 'TRUCK', 'SHIP')
-),
-answers AS (
-    SELECT DISTINCT
-        r_name AS answervalue
-    FROM base
-),
-ranked AS (
-    SELECT
-        answervalue,
-        ROW_NUMBER() OVER (ORDER BY answervalue) AS answer_id
-    FROM answers
+      AND ol.o_orderdate >= DATE '1995-04-01'
+      AND ol.o_orderdate <  DATE '1995-04-06'
+      AND ol.l_quantity > 25
+      AND ol.l_discount BETWEEN 0.02 AND 0.08
+      AND ol.l_shipmode IN ('AIR', 'TRUCK', 'SHIP')
 ),
 witnesses AS (
+    -- answer_id numbers the distinct answer values in order, straight from
+    -- base (no separate answers/ranked CTEs joined back)
     SELECT
-        r.answer_id,
-        r.answervalue,
+        DENSE_RANK() OVER (ORDER BY b.r_name) AS answer_id,
+        b.r_name AS answervalue,
+        -- witnesses numbered by their keys, so support_id is the same on
+        -- every run (the scan order is not, with parallel threads)
         ROW_NUMBER() OVER (
-            PARTITION BY r.answer_id
-            ORDER BY b.o_orderkey, b.l_orderkey, b.l_linenumber,
-                     b.s_suppkey, b.n_nationkey, b.r_regionkey
+            PARTITION BY b.r_name
+            ORDER BY b.o_orderkey, b.l_orderkey, b.l_linenumber, b.s_suppkey, b.n_nationkey, b.r_regionkey
         ) AS support_id,
         b.o_orderkey,
         b.l_orderkey,
@@ -481,79 +396,28 @@ witnesses AS (
         b.s_suppkey,
         b.n_nationkey,
         b.r_regionkey
-    FROM ranked r
-    JOIN base   b ON b.r_name = r.answervalue
-),
-orders_support AS (
-    SELECT DISTINCT
-        answer_id,
-        support_id,
-        answervalue,
-        'orders' AS rel,
-        o_orderkey::BIGINT AS key1,
-        NULL::BIGINT      AS key2,
-        NULL::BIGINT      AS key3,
-        NULL::BIGINT      AS key4
-    FROM witnesses
-),
-lineitem_support AS (
-    SELECT DISTINCT
-        answer_id,
-        support_id,
-        answervalue,
-        'lineitem' AS rel,
-        l_orderkey::BIGINT   AS key1,
-        l_linenumber::BIGINT AS key2,
-        NULL::BIGINT         AS key3,
-        NULL::BIGINT         AS key4
-    FROM witnesses
-),
-supplier_support AS (
-    SELECT DISTINCT
-        answer_id,
-        support_id,
-        answervalue,
-        'supplier' AS rel,
-        s_suppkey::BIGINT AS key1,
-        NULL::BIGINT     AS key2,
-        NULL::BIGINT     AS key3,
-        NULL::BIGINT     AS key4
-    FROM witnesses
-),
-nation_support AS (
-    SELECT DISTINCT
-        answer_id,
-        support_id,
-        answervalue,
-        'nation' AS rel,
-        n_nationkey::BIGINT AS key1,
-        NULL::BIGINT       AS key2,
-        NULL::BIGINT       AS key3,
-        NULL::BIGINT       AS key4
-    FROM witnesses
-),
-region_support AS (
-    SELECT DISTINCT
-        answer_id,
-        support_id,
-        answervalue,
-        'region' AS rel,
-        r_regionkey::BIGINT AS key1,
-        NULL::BIGINT       AS key2,
-        NULL::BIGINT       AS key3,
-        NULL::BIGINT       AS key4
-    FROM witnesses
+    FROM base b
 ),
 support_flat AS (
-    SELECT * FROM orders_support
-    UNION ALL
-    SELECT * FROM lineitem_support
-    UNION ALL
-    SELECT * FROM supplier_support
-    UNION ALL
-    SELECT * FROM nation_support
-    UNION ALL
-    SELECT * FROM region_support
+    -- one scan of witnesses, one row per (witness, relation)
+    SELECT
+        w.answer_id,
+        w.support_id,
+        w.answervalue,
+        v.rel,
+        v.key1,
+        v.key2,
+        NULL::BIGINT AS key3,
+        NULL::BIGINT AS key4
+    FROM witnesses w
+    CROSS JOIN (
+        VALUES
+        ('orders', w.o_orderkey::BIGINT, NULL::BIGINT),
+        ('lineitem', w.l_orderkey::BIGINT, w.l_linenumber::BIGINT),
+        ('supplier', w.s_suppkey::BIGINT, NULL::BIGINT),
+        ('nation', w.n_nationkey::BIGINT, NULL::BIGINT),
+        ('region', w.r_regionkey::BIGINT, NULL::BIGINT)
+    ) AS v(rel, key1, key2)
 )
 SELECT
     'Q5' AS qname,
@@ -564,15 +428,8 @@ SELECT
     key1,
     key2,
     key3,
-    key4,
-    CASE
-        WHEN rel = 'lineitem' THEN
-            CAST(key1 AS VARCHAR) || ',' || CAST(key2 AS VARCHAR)
-        ELSE
-            CAST(key1 AS VARCHAR)
-    END AS pk
-FROM support_flat
-ORDER BY answer_id, support_id, rel, key1, key2;
+    key4
+FROM support_flat;
 """
 
 
@@ -584,20 +441,36 @@ ORDER BY answer_id, support_id, rel, key1, key2;
 # Helpers
 # ---------------------------------------------------------------------------
 
+def _subdirs(path: str, prefix: str):
+    with os.scandir(path) as it:
+        return [e.path for e in it if e.name.startswith(prefix) and e.is_dir()]
+
+
 def iter_duckdb_files(base: Path):
-    return base.rglob("*.duckdb")
+    """
+    base/sf*/subset*/<ratio>/seed*/*.duckdb, walked level by level with
+    os.scandir (the layout is fixed, so no recursive glob / stat per entry).
+    """
+    for sf_dir in _subdirs(base, "sf"):
+        for subset_dir in _subdirs(sf_dir, "subset"):
+            for ratio_dir in _subdirs(subset_dir, ""):
+                for seed_dir in _subdirs(ratio_dir, "seed"):
+                    with os.scandir(seed_dir) as it:
+                        for e in it:
+                            if e.name.endswith(".duckdb") and e.is_file():
+                                yield Path(e.path)
 
 
 def derive_output_path_and_meta(db_path: Path):
     """
     violations/sf0.1/subsetB/0p01pct/seed09/tpch_...duckdb
-      -> support_sets/sf0.1/subsetB/0p01pct/seed09/
+      -> support_sets/scale=sf0.1/subset=subsetB/ratio=0p01pct/seed=seed09/
     """
     rel = db_path.relative_to(VIOLATIONS_BASE)
     if len(rel.parts) < 5:
         raise ValueError(f"Unexpected DB path: {db_path}")
     sf, subset, ratio, seed_dir = rel.parts[:4]
-    out_dir = SUPPORT_BASE / sf / subset / ratio / seed_dir
+    out_dir = SUPPORT_BASE / f"scale={sf}" / f"subset={subset}" / f"ratio={ratio}" / f"seed={seed_dir}"
     meta = {
         "scale": sf,
         "subset": subset,
@@ -607,52 +480,138 @@ def derive_output_path_and_meta(db_path: Path):
     return out_dir, meta
 
 
-def extract_for_db(db_path: Path):
-    out_dir, meta = derive_output_path_and_meta(db_path)
-    out_dir.mkdir(parents=True, exist_ok=True)
-
-    print(f"== DB: {db_path} -> {out_dir}")
-    con = duckdb.connect(str(db_path))
-
-    for qname in QUERIES:
-        sql_inner = TPCH_SUPPORT_SQL[qname].strip().rstrip(";")
-
-        # Add meta outside SQL
-        sql_with_meta = f"""
-        SELECT
-            '{meta['scale']}'  AS scale,
-            '{meta['subset']}' AS subset,
-            '{meta['ratio']}'  AS ratio,
-            '{meta['seed']}'   AS seed,
-            s.*
-        FROM ({sql_inner}) AS s
-        """
+def support_pk(tbl: pa.Table) -> pa.Array:
+    """
+    pk string used in tuple_measures: "key1", or "key1,key2" for the rows
+    with a key2 (lineitem); built with vectorized Arrow casts / joins.
+    """
+    return pc.binary_join_element_wise(
+        pc.cast(tbl["key1"], pa.string()),
+        pc.cast(tbl["key2"], pa.string()),
+        ",",
+        null_handling="skip",
+    )
 
-        out_file = out_dir / f"{qname}_support.parquet"
-        print(f"  [RUN ] {qname} -> {out_file.name}")
 
-        copy_sql = f"COPY ({sql_with_meta}) TO '{out_file.as_posix()}' (FORMAT PARQUET);"
-        con.execute(copy_sql)
+def prepare_support_queries(con: duckdb.DuckDBPyConnection):
+    """
+    PREPARE `support_all` on `con`: Q1–Q5 as one UNION ALL statement (all
+    five share the output schema), unsorted: the consumers group the rows
+    and none relies on the file order, so no full sort is paid per DB.
+    Binding needs a DB attached as `src` and its ord_line table. Parsed once per connection;
+    DuckDB rebinds it to whichever DB is attached as `src` when executed.
+    """
+    # meta (DB key) is carried by the hive-style out_dir, not by columns
+    union_sql = "\nUNION ALL\n".join(
+        f"({TPCH_SUPPORT_SQL[qname].strip().rstrip(';')})" for qname in QUERIES
+    )
+    con.execute(f"""
+        PREPARE support_all AS
+        SELECT * FROM ({union_sql})
+    """)
+
+
+def outputs_up_to_date(out_dir: Path, db_path: Path) -> bool:
+    """True if every Q*_support.parquet of out_dir is newer than db_path."""
+    db_mtime = db_path.stat().st_mtime
+    try:
+        return all(
+            (out_dir / f"{qname}_support.parquet").stat().st_mtime > db_mtime
+            for qname in QUERIES
+        )
+    except FileNotFoundError:
+        return False
+
+
+def extract_for_db(con: duckdb.DuckDBPyConnection, db_path: Path, prepare: bool = False) -> bool:
+    """
+    Run Q1–Q5 on one DB, ATTACHed read-only as `src` to the shared
+    connection `con` (and made the default catalog, so the queries use the
+    plain TPC-H table names); detached again afterwards. The queries run as
+    one statement; its result is split into the per-query files.
+    prepare: run prepare_support_queries on `con` first (once per connection).
+    Skipped when all per-query files exist and are newer than the DB.
+    Returns whether the queries ran.
+    """
+    out_dir, _ = derive_output_path_and_meta(db_path)
+    if outputs_up_to_date(out_dir, db_path):
+        print(f"== DB: {db_path} -> {out_dir} [SKIP] up to date")
+        return False
+    out_dir.mkdir(parents=True, exist_ok=True)
 
-    con.close()
+    print(f"== DB: {db_path} -> {out_dir}")
+    # ATTACH takes no bound parameters: the path is inlined as an escaped literal
+    path_sql = db_path.as_posix().replace("'", "''")
+    con.execute(f"ATTACH '{path_sql}' AS src (READ_ONLY)")
+    con.execute("USE src")
+
+    try:
+        con.execute(ORD_LINE_SQL)
+        if prepare:
+            prepare_support_queries(con)
+        print(f"  [RUN ] {', '.join(QUERIES)}")
+        # .arrow() is a Table or a RecordBatchReader depending on the DuckDB version
+        tbl = pa.table(con.execute("EXECUTE support_all").arrow())
+        tbl = tbl.append_column("pk", support_pk(tbl))
+
+        for qname in QUERIES:
+            out_file = out_dir / f"{qname}_support.parquet"
+            print(f"  [WRITE] {qname} -> {out_file.name}")
+            # written under a temp name and renamed: a run killed mid-write
+            # leaves no truncated file that outputs_up_to_date would accept
+            tmp_file = out_file.with_suffix(".tmp")
+            pq.write_table(tbl.filter(pc.equal(tbl["qname"], qname)), tmp_file, **PARQUET_OPTIONS)
+            os.replace(tmp_file, out_file)
+    finally:
+        con.execute("DROP TABLE IF EXISTS ord_line")
+        con.execute("USE memory")
+        con.execute("DETACH src")
+    return True
+
+
+# connection of a pool worker, opened once by _init_worker; its queries are
+# prepared with the first DB it extracts
+_worker_con: duckdb.DuckDBPyConnection | None = None
+_worker_prepared = False
+
+
+def _init_worker():
+    global _worker_con
+    _worker_con = duckdb.connect(
+        config={
+            "threads": str(THREADS_PER_DB),
+            "memory_limit": MEMORY_LIMIT_PER_DB,
+            "preserve_insertion_order": False,
+        }
+    )
+
+
+def _extract_task(db_path: Path):
+    global _worker_prepared
+    if extract_for_db(_worker_con, db_path, prepare=not _worker_prepared):
+        _worker_prepared = True
+
+
+def support_view_sql(support_base: Path) -> str:
+    """
+    CREATE VIEW all_support_sets over the per-DB parquet files under
+    support_base, DB key columns (from the hive paths) first.
+    """
+    pattern = (support_base / "scale=*/subset=*/ratio=*/seed=*/Q*_support.parquet").as_posix()
+    pattern = pattern.replace("'", "''")
+    return f"""CREATE OR REPLACE VIEW all_support_sets AS
+SELECT scale, subset, ratio, seed, * EXCLUDE (scale, subset, ratio, seed)
+FROM read_parquet('{pattern}', hive_partitioning = true, hive_types_autocast = false);
+"""
 
 
-def build_merged():
-    """
-    Use DuckDB union per-DB parquet
+def write_support_view():
     """
-    pattern = (SUPPORT_BASE / "sf*/subset*/0p*pct/seed*/Q*_support.parquet").as_posix()
-    print(f"[MERGE] reading from pattern: {pattern}")
-    con = duckdb.connect()
-    merge_sql = f"""
-    COPY (
-        SELECT *
-        FROM read_parquet('{pattern}')
-    ) TO '{MERGED_OUT.as_posix()}' (FORMAT PARQUET);
+    Store the all_support_sets view definition next to the per-DB files,
+    instead of rewriting all rows into one merged parquet file.
     """
-    con.execute(merge_sql)
-    con.close()
-    print(f"[MERGE] written merged file: {MERGED_OUT}")
+    SUPPORT_VIEW.write_text(support_view_sql(SUPPORT_BASE))
+    print(f"[VIEW] written view definition: {SUPPORT_VIEW}")
 
 
 def main():
@@ -664,11 +623,15 @@ def main():
         return
 
     print(f"Found {len(db_files)} DuckDB files.")
-    for db_path in db_files:
-        extract_for_db(db_path)
 
-    # merge
-    build_merged()
+    # DBs write disjoint output dirs: extract them in a process pool. Each
+    # worker keeps one in-memory DuckDB and ATTACHes its DBs in turn instead
+    # of paying a fresh connect (catalog, thread pool) per file.
+    n_workers = max(1, (os.cpu_count() or 1) // THREADS_PER_DB)
+    with ProcessPoolExecutor(max_workers=n_workers, initializer=_init_worker) as ex:
+        list(ex.map(_extract_task, db_files))
+
+    write_support_view()
 
 
 if __name__ == "__main__":